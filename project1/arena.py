@@ -0,0 +1,52 @@
+from array import array
+
+
+class StringArena:
+    '''
+    Store strings UTF-8 encoded back to back in one shared bytearray.
+
+    Each stored string is identified by an integer handle, string i occupying
+    data[offsets[i]:offsets[i+1]]. Equal strings are interned, i.e. stored once and
+    given the same handle, which pays off for translations shared by many words.
+    '''
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+        self.table = {}  # hash of the encoded string -> handle
+        self.collisions = {}  # encoded string -> handle, only for hash collisions in table
+
+    def __len__(self):
+        '''Return the number of distinct strings stored.'''
+        return len(self.offsets) - 1
+
+    def add(self, s):
+        '''
+        Store the string s unless an equal string is already stored.
+
+        Returns:
+            - the handle of the stored string.
+        '''
+        b = s.encode('utf-8')
+        h = hash(b)
+        handle = self.table.get(h)
+        if handle is not None:
+            if self.get(handle) == b:
+                return handle
+            if b in self.collisions:
+                return self.collisions[b]
+        handle = len(self.offsets) - 1
+        self.data += b
+        self.offsets.append(len(self.data))
+        if h in self.table:
+            self.collisions[b] = handle
+        else:
+            self.table[h] = handle
+        return handle
+
+    def get(self, handle):
+        '''Return the UTF-8 bytes of the string with the given handle.'''
+        return bytes(self.data[self.offsets[handle]:self.offsets[handle + 1]])
+
+    def decode(self, handle):
+        '''Return the string with the given handle.'''
+        return self.data[self.offsets[handle]:self.offsets[handle + 1]].decode('utf-8')
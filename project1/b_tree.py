@@ -1,5 +1,9 @@
 import os
 import time
+from bisect import bisect_left
+from frozen_dict import FrozenDict
+from arena import StringArena
+from front_coding import FrontCodedKeys
 
 class BTNode:
     '''
@@ -26,15 +30,56 @@ class BTNode:
         return self.n == 2*t - 1
 
 class BTree:
-    def __init__(self, t):
+    def __init__(self, t, compact=False, compress_leaves=False):
         '''
         Initialize a B-tree.
         
         Parameters:
             - t: order of the B-tree, i.e., each x (except the root) has at least t-1 keys and at most 2t-1 keys.
+            - compact: whether to store the words in compact form, default is False.
+              In compact mode keys are UTF-8 encoded bytes and values are handles into a shared
+              StringArena, see RedBlackTree. search/insertb/deleteb work on the stored form.
+            - compress_leaves: whether to front-code the keys of leaves, default is False.
+              Leaf keys are then kept in a FrontCodedKeys object instead of a list, which
+              saves most of the memory taken by keys sharing long prefixes when t is large.
         '''
-        self.root = BTNode(isleaf=True)
         self.t = t
+        self.compact = compact
+        self.arena = StringArena() if compact else None
+        self.compress_leaves = compress_leaves
+        self.root = BTNode(isleaf=True, keys=self._leaf_keys())
+        self.size = 0  # number of keys in the tree
+    
+    def _leaf_keys(self, keys=()):
+        '''Create the key list of a new leaf holding the given keys.'''
+        return FrontCodedKeys(keys, raw=self.compact) if self.compress_leaves else list(keys)
+    
+    def _find(self, x, key):
+        '''
+        Binary search the keys of node x.
+        
+        Returns:
+            - the smallest i such that key <= x.keys[i], or x.n if there is none.
+        '''
+        if isinstance(x.keys, FrontCodedKeys):
+            return x.keys.bisect_left(key)
+        return bisect_left(x.keys, key)
+    
+    def _encode_key(self, word):
+        '''Convert an English word into the stored key.'''
+        return word.encode('utf-8') if self.compact else word
+    
+    def _encode_value(self, meaning):
+        '''Convert a Chinese translation into the stored value.'''
+        return self.arena.add(meaning) if self.compact else meaning
+    
+    def _decode_key(self, key):
+        '''Convert a stored key back into the English word.'''
+        return key.decode('utf-8') if self.compact else key
+    
+    def _decode_value(self, value):
+        '''Convert a stored value back into the Chinese translation.'''
+        return self.arena.decode(value) if self.compact else value
         
     def search(self, key, x=None):
         '''
@@ -50,9 +95,7 @@ class BTree:
         '''
         if x is None:
             x = self.root
-        i = 0
-        while i < x.n and key > x.keys[i]:  # find the smallest i such that key <= x.keys[i]
-            i += 1
+        i = self._find(x, key)  # find the smallest i such that key <= x.keys[i]
         if i < x.n and key == x.keys[i]:  # the key is in x
             return x, i
         elif x.isleaf:
@@ -75,6 +118,7 @@ class BTree:
                 self._insert_nonfull(s, key, value)
             else:
                 self._insert_nonfull(r, key, value)
+            self.size += 1
             return True
         return False  # the key is already in the tree
 
@@ -91,22 +135,15 @@ class BTree:
             - True: if the key is successfully inserted.
             - False: if the key is already in the tree.
         '''
-        i = x.n - 1
+        i = self._find(x, key)  # the position to insert, or the index of the child to insert
+        if i < x.n and key == x.keys[i]:
+            return False  # the key is already in the tree
         if x.isleaf:
-            while i >= 0 and key < x.keys[i]:  # find the position to insert
-                i -= 1
-            if i >= 0 and key == x.keys[i]:
-                return False  # the key is already in the tree
-            x.keys.insert(i+1, key)  # insert key into x
-            x.values.insert(i+1, value)
+            x.keys.insert(i, key)  # insert key into x
+            x.values.insert(i, value)
             x.n += 1
             return True
         else:
-            while i >= 0 and key < x.keys[i]:  # find the child to insert
-                i -= 1
-            if i >= 0 and key == x.keys[i]:
-                return False  # the key is already in the tree
-            i += 1  # i is the index of the child to insert
             if x.c[i].is_full(self.t):
                 self._split_child(x, i)
                 if key > x.keys[i]:  # insert into the new child
@@ -165,10 +202,9 @@ class BTree:
             x = self.root
             if self.search(key, x) is None:
                 return False
+            self.size -= 1
         t = self.t
-        i = 0
-        while i < x.n and key > x.keys[i]:
-            i += 1
+        i = self._find(x, key)
         
         # Case 1: x is a leaf, delete directly
         if x.isleaf:
@@ -355,13 +391,13 @@ class BTree:
             with open(output_file, 'w', encoding='utf-8') as f:
                 self.preorder_print(node, level, child, output_file, f)
         elif file is not None:
-            keys_str = '/'.join(map(str, node.keys))
+            keys_str = '/'.join(map(str, map(self._decode_key, node.keys)))
             file.write(f"level={level} child={child} /{keys_str}/\n")
             if not node.isleaf:
                 for i, child_node in enumerate(node.c):
                     self.preorder_print(child_node, level+1, i, output_file, file)
         else:
-            keys_str = '/'.join(map(str, node.keys))
+            keys_str = '/'.join(map(str, map(self._decode_key, node.keys)))
             print(f"level={level} child={child} /{keys_str}/")
             if not node.isleaf:
                 for i, child_node in enumerate(node.c):
@@ -389,7 +425,7 @@ class BTree:
                 for index, line in enumerate(lines[1:], start=1):
                     word = line.strip().split(' ')
                     if len(word) == 2:
-                        self.insertb(word[0], word[1])
+                        self.insertb(self._encode_key(word[0]), self._encode_value(word[1]))
                     else:
                         return []
                     
@@ -421,7 +457,7 @@ class BTree:
                 for index, line in enumerate(lines[1:], start=1):
                     word = line.strip().split(' ')
                     if len(word) == 2:
-                        self.insertb(word[0], word[1])
+                        self.insertb(self._encode_key(word[0]), self._encode_value(word[1]))
                     else:
                         return []
                     
@@ -433,7 +469,7 @@ class BTree:
                 for index, line in enumerate(lines[1:], start=1):
                     word = line.strip().split(' ')
                     if len(word) == 1:
-                        self.deleteb(word[0])
+                        self.deleteb(self._encode_key(word[0]))
                     else:
                         return []
                     
@@ -450,7 +486,7 @@ class BTree:
         '''
         Insert the given English word and its Chinese translation into the B-tree.
         '''
-        if self.insertb(en, cn):
+        if self.insertb(self._encode_key(en), self._encode_value(cn)):
             return "Insertion succeeded."
         else:
             return f"\"{en}\" already exists!"
@@ -459,11 +495,172 @@ class BTree:
         '''
         Delete the given English word from the B-tree.
         '''
-        if self.deleteb(en):
+        if self.deleteb(self._encode_key(en)):
             return "Deletion succeeded."
         else:
             return f"\"{en}\" not found!"
         
+    def delete_range(self, low, high):
+        '''
+        Delete all words in the specified range [low, high].
+        
+        Returns:
+            - The number of words deleted.
+        '''
+        low, high = self._encode_key(low), self._encode_key(high)
+        keys = []
+        self._collect(self.root, keys, low, high)
+        return self._delete_keys(keys)
+    
+    def delete_batch(self, words):
+        '''
+        Delete the given words.
+        
+        Parameters:
+            - words: the English words to delete, in any order. Words not in the tree are ignored.
+        
+        Returns:
+            - The number of words deleted.
+        '''
+        return self._delete_keys(sorted(set(self._encode_key(word) for word in words)))
+    
+    def _collect(self, x, keys, low, high):
+        '''
+        Append the keys in [low, high] of the subtree rooted at x to keys, in order.
+        '''
+        i = self._find(x, low)
+        while i <= x.n:
+            if not x.isleaf:
+                self._collect(x.c[i], keys, low, high)
+            if i == x.n or x.keys[i] > high:
+                break
+            keys.append(x.keys[i])
+            i += 1
+    
+    def _delete_keys(self, keys):
+        '''
+        Delete the given sorted keys in a single descent of the tree. Keys not in the tree are ignored.
+        
+        The keys are partitioned among the children of each node and deleted from every subtree
+        bottom-up, leaving its root short of keys if need be; each node then tops up its short
+        children once, on the way back up, by merging them with or borrowing from a sibling.
+        Deleting k keys visits only the nodes on their paths, O(k log(n/k)) nodes for k spread keys.
+        
+        Returns:
+            - The number of keys deleted.
+        '''
+        count = self._delete_sorted(self.root, keys, 0, len(keys))
+        while not self.root.isleaf and self.root.n == 0:  # the root has lost all its keys
+            self.root = self.root.c[0]
+        self.size -= count
+        return count
+    
+    def _delete_sorted(self, x, keys, lo, hi):
+        '''
+        Delete keys[lo:hi] from the subtree rooted at x, leaving x with fewer than t-1 keys if need be.
+        The children of x are topped up, except when x is left with a single child.
+        
+        Returns:
+            - The number of keys deleted.
+        '''
+        if x.isleaf:
+            found = []
+            for j in range(lo, hi):
+                i = self._find(x, keys[j])
+                if i < x.n and x.keys[i] == keys[j]:
+                    found.append(i)
+            if len(found) == 1:
+                x.keys.pop(found[0])
+                x.values.pop(found[0])
+            elif found:  # rebuild the leaf rather than shift it once per key
+                gone = set(found)
+                kept = [i for i in range(x.n) if i not in gone]
+                x.keys = self._leaf_keys([x.keys[i] for i in kept])
+                x.values = [x.values[i] for i in kept]
+            x.n -= len(found)
+            return len(found)
+        count = 0
+        matched = []  # indices of the keys of x to delete
+        j = lo
+        while j < hi:
+            i = self._find(x, keys[j])
+            end = hi if i == x.n else bisect_left(keys, x.keys[i], j, hi)  # keys[j:end] go to x.c[i]
+            if j < end:
+                count += self._delete_sorted(x.c[i], keys, j, end)
+            if end < hi and keys[end] == x.keys[i]:
+                matched.append(i)
+                end += 1
+            j = end
+        for i in reversed(matched):  # replace each by its predecessor, now that x.c[i] is done
+            item = self._pop_max(x.c[i])
+            if item is None:  # the subtree x.c[i] is empty, drop it along with the key
+                x.keys.pop(i)
+                x.values.pop(i)
+                x.c.pop(i)
+                x.n -= 1
+            else:
+                x.keys[i], x.values[i] = item
+        self._fix_children(x)
+        return count + len(matched)
+    
+    def _pop_max(self, x):
+        '''
+        Remove the greatest key of the subtree rooted at x, whose children are all topped up,
+        leaving x with fewer than t-1 keys if need be.
+        
+        Returns:
+            - (key, value), or None if the subtree is empty.
+        '''
+        if x.isleaf:
+            if x.n == 0:
+                return None
+            x.n -= 1
+            return x.keys.pop(), x.values.pop()
+        item = self._pop_max(x.c[-1])
+        if item is not None and x.c[-1].n < self.t - 1 and len(x.c) > 1:
+            self._combine(x, len(x.c) - 2)
+        return item
+    
+    def _fix_children(self, x):
+        '''
+        Top up every child of x holding fewer than t-1 keys, unless x has a single child.
+        '''
+        i = 0
+        while i < len(x.c) and len(x.c) > 1:
+            if x.c[i].n < self.t - 1:
+                i = min(i, len(x.c) - 2)  # combine with the right sibling, or the left one for the last child
+                self._combine(x, i)  # and check again, the result may still be short
+            else:
+                i += 1
+    
+    def _combine(self, x, i):
+        '''
+        Merge x.c[i], x.keys[i] and x.c[i+1] into one node, or, if that holds more than
+        2t-1 keys, share their keys evenly between the two children.
+        '''
+        y, z = x.c[i], x.c[i + 1]
+        keys = list(y.keys) + [x.keys[i]] + list(z.keys)
+        values = y.values + [x.values[i]] + z.values
+        children = y.c + z.c
+        m = len(keys)
+        if m <= 2*self.t - 1:
+            nodes = [(y, 0, m)]
+            x.keys.pop(i)
+            x.values.pop(i)
+            x.c.pop(i + 1)
+            x.n -= 1
+        else:
+            h = (m - 1) // 2
+            nodes = [(y, 0, h), (z, h + 1, m)]
+            x.keys[i], x.values[i] = keys[h], values[h]
+        for node, a, b in nodes:
+            node.keys = self._leaf_keys(keys[a:b]) if node.isleaf else keys[a:b]
+            node.values = values[a:b]
+            node.n = b - a
+            if not node.isleaf:
+                node.c = children[a:b + 1]
+                self._fix_children(node)  # a child with a single child may have brought a short one
+    
     def rangesearch(self, low, high, x=None, result=None):
         '''
         Search for words in the specified range [low, high].
@@ -479,16 +676,15 @@ class BTree:
         '''
         if x is None:
             x = self.root
+            low, high = self._encode_key(low), self._encode_key(high)
         if result is None:
             result = []
         
-        i = 0
-        while i < x.n and low > x.keys[i]:
-            i += 1
+        i = self._find(x, low)
 
         if x.isleaf:
             while i < x.n and x.keys[i] <= high:
-                result.append((x.keys[i], x.values[i]))
+                result.append((self._decode_key(x.keys[i]), self._decode_value(x.values[i])))
                 i += 1
         else:
             if i >= x.n or x.keys[i] > high:
@@ -496,7 +692,7 @@ class BTree:
             else:
                 while i < x.n and x.keys[i] <= high:
                     self.rangesearch(low, high, x.c[i], result)
-                    result.append((x.keys[i], x.values[i]))
+                    result.append((self._decode_key(x.keys[i]), self._decode_value(x.values[i])))
                     i += 1
                 if x.keys[i-1] < high:
                     self.rangesearch(low, high, x.c[i], result)
@@ -507,12 +703,45 @@ class BTree:
         '''
         Search for the given English word in the B-tree. Return the Chinese translation if found, otherwise return "Word not found!".
         '''
-        result = self.search(word)
+        result = self.search(self._encode_key(word))
         if result:
-            return result[0].values[result[1]]
+            return self._decode_value(result[0].values[result[1]])
         else:
             return "Word not found!"
 
+    def inorder(self, x=None, result=None):
+        '''
+        Traverse the B-tree in order.
+        
+        Parameters:
+            - x: the current node in the traversal, default is the root.
+            - result: list to store the result, default is an empty list.
+        
+        Returns:
+            - A list of tuples (word, meaning) in ascending order of words.
+        '''
+        if x is None:
+            x = self.root
+        if result is None:
+            result = []
+        
+        for i in range(x.n):
+            if not x.isleaf:
+                self.inorder(x.c[i], result)
+            result.append((self._decode_key(x.keys[i]), self._decode_value(x.values[i])))
+        if not x.isleaf:
+            self.inorder(x.c[x.n], result)
+        return result
+    
+    def freeze(self):
+        '''
+        Take a read-only snapshot of the B-tree for lookup-heavy workloads.
+        
+        Returns:
+            - A FrozenDict supporting singlesearch, rangesearch and prefixsearch.
+        '''
+        return FrozenDict(self.inorder())
+
 
 if __name__ == "__main__":
 
@@ -0,0 +1,40 @@
+import random
+import time
+import tracemalloc
+from rb_tree import RedBlackTree
+from b_tree import BTree
+from freeze_bench import load_words
+
+
+def build(make_tree, lines):
+    '''Build a tree from the given "word meaning" lines and measure the memory it holds.'''
+    tracemalloc.start()
+    tree = make_tree()
+    for line in lines:
+        en, cn = line.split(' ')  # the strings are created while tracing, as in initialize
+        tree.insert_word(en, cn)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tree, memory
+
+
+def lookup_time(tree, queries):
+    start = time.perf_counter()
+    for q in queries:
+        tree.singlesearch(q)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    for scale in [1, 10, 50]:
+        # copies share their translations, as synonyms and inflections do in a real dictionary
+        words = load_words('./project1/1_initial.txt', scale)
+        random.seed(0)
+        random.shuffle(words)
+        queries = [en for en, _ in random.sample(words, min(len(words), 20000))]
+        print(f'n = {len(words)}, distinct translations = {len(set(cn for _, cn in words))}')
+        for name, make_tree in [('RBT', RedBlackTree), ('RBT compact', lambda: RedBlackTree(compact=True)),
+                                ('BT', lambda: BTree(t=10)), ('BT compact', lambda: BTree(t=10, compact=True))]:
+            tree, memory = build(make_tree, [f'{en} {cn}' for en, cn in words])
+            print(f'  {name:12s} memory {memory / 2**20:8.2f} MiB ({memory / len(words):6.1f} B/word), '
+                  f'lookup x{len(queries)} {lookup_time(tree, queries):.4f}s')
@@ -0,0 +1,44 @@
+import random
+from rb_tree import RedBlackTree
+from b_tree import BTree
+from freeze_bench import load_words
+from benchutil import timed
+
+
+def build(make_tree, words):
+    tree = make_tree()
+    for en, cn in words:
+        tree.insert_word(en, cn)
+    return tree
+
+
+if __name__ == "__main__":
+    with open('./project1/2_delete.txt', 'r', encoding='utf-8') as f:
+        deletions = [line.strip() for line in f.readlines()[1:] if line.strip()]
+    for scale in [1, 100]:
+        words = load_words('./project1/1_initial.txt', scale)
+        random.seed(0)
+        random.shuffle(words)
+        # 2_delete.txt deletes 100 of 3328 words, keep the same ratio on the larger dictionary
+        batch = deletions + [en for en, _ in random.sample(words, len(deletions) * (scale - 1))]
+        keys = sorted(en for en, _ in words)
+        low = keys[len(keys) // 3]
+        high = keys[len(keys) // 3 + len(batch)]
+        wide_high = keys[2 * len(keys) // 3]
+        print(f'n = {len(words)}, batch of {len(batch)} words, range of {len(batch) + 1} and {len(keys) // 3 + 1} words')
+        for name, make_tree in [('RBT', RedBlackTree), ('BT', lambda: BTree(t=10))]:
+            tree = build(make_tree, words)
+            _, time_single = timed(lambda: [tree.delete_word(w) for w in batch])
+            tree = build(make_tree, words)
+            _, time_batch = timed(tree.delete_batch, batch)
+            tree = build(make_tree, words)
+            _, time_range_single = timed(lambda: [tree.delete_word(w) for w in keys[len(keys) // 3:len(keys) // 3 + len(batch) + 1]])
+            tree = build(make_tree, words)
+            _, time_range = timed(tree.delete_range, low, high)
+            tree = build(make_tree, words)
+            _, time_wide_single = timed(lambda: [tree.delete_word(w) for w in keys[len(keys) // 3:2 * len(keys) // 3 + 1]])
+            tree = build(make_tree, words)
+            _, time_wide = timed(tree.delete_range, low, wide_high)
+            print(f'  {name}: batch per-key {time_single:.4f}s vs delete_batch {time_batch:.4f}s; '
+                  f'range per-key {time_range_single:.4f}s vs delete_range {time_range:.4f}s; '
+                  f'wide range per-key {time_wide_single:.4f}s vs delete_range {time_wide:.4f}s')
@@ -0,0 +1,65 @@
+import random
+import time
+from rb_tree import RedBlackTree, RBNode
+from b_tree import BTree
+
+
+def load_words(filename, scale=1):
+    '''
+    Load (word, meaning) pairs from an INSERT file, repeated scale times with suffixed words.
+    '''
+    with open(filename, 'r', encoding='utf-8') as f:
+        lines = f.readlines()[1:]
+    pairs = [line.strip().split(' ') for line in lines]
+    pairs = [p for p in pairs if len(p) == 2]
+    words = []
+    for s in range(scale):
+        suffix = '' if s == 0 else str(s)
+        words.extend((en + suffix, cn) for en, cn in pairs)
+    return words
+
+
+def timeit(func, queries):
+    start = time.perf_counter()
+    for q in queries:
+        func(q)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    for scale in [1, 10, 100]:
+        words = load_words('./project1/1_initial.txt', scale)
+        random.seed(0)
+        random.shuffle(words)
+        rbt = RedBlackTree()
+        bt = BTree(t=10)
+        for en, cn in words:
+            rbt.insertrb(RBNode(en, cn))
+            bt.insertb(en, cn)
+
+        start = time.perf_counter()
+        frbt = rbt.freeze()
+        time_freeze_rbt = time.perf_counter() - start
+        start = time.perf_counter()
+        fbt = bt.freeze()
+        time_freeze_bt = time.perf_counter() - start
+
+        hits = [en for en, _ in random.sample(words, min(len(words), 20000))]
+        misses = [en + '#' for en in hits]
+        queries = hits + misses
+        ranges = [(en, en[:2] + 'z') for en in hits[:20]]
+        prefixes = [en[:3] for en in hits[:200]]
+
+        print(f'n = {len(words)}')
+        print(f'  freeze time: RBT {time_freeze_rbt:.4f}s, BT {time_freeze_bt:.4f}s')
+        print(f'  singlesearch x{len(queries)}: '
+              f'RBT {timeit(rbt.singlesearch, queries):.4f}s, '
+              f'BT {timeit(bt.singlesearch, queries):.4f}s, '
+              f'frozen {timeit(frbt.singlesearch, queries):.4f}s')
+        print(f'  rangesearch x{len(ranges)}: '
+              f'RBT {timeit(lambda r: rbt.rangesearch(*r), ranges):.4f}s, '
+              f'BT {timeit(lambda r: bt.rangesearch(*r), ranges):.4f}s, '
+              f'frozen {timeit(lambda r: frbt.rangesearch(*r), ranges):.4f}s')
+        print(f'  prefixsearch x{len(prefixes)}: '
+              f'frozen {timeit(frbt.prefixsearch, prefixes):.4f}s')
+        assert frbt.rangesearch('a', 'z') == fbt.rangesearch('a', 'z') == bt.rangesearch('a', 'z')
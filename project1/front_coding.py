@@ -0,0 +1,261 @@
+from bisect import bisect_left, bisect_right
+
+
+class FrontCodedKeys:
+    '''
+    A sorted list of keys stored with front coding, used for the keys of B-tree leaves.
+
+    The keys are cut into blocks of about interval keys. The first key of every block (its
+    restart point) is kept in full in heads; each of the other keys is stored as (length
+    of the prefix shared with the previous key, length of the rest, the rest), packed into
+    one bytes object per block. A lookup binary searches the heads and then decodes the keys
+    of one block. As every block starts from a full key, insert and pop only repack the block
+    they touch: a block is split in two when it grows past 2*interval keys and dropped when
+    it becomes empty. The object behaves like the list of keys it replaces: indexing,
+    slicing, iteration, insert, pop, append and extend are supported.
+    '''
+    __slots__ = ('heads', 'blocks', 'starts', 'n', 'raw', 'interval', '_cache')
+
+    def __init__(self, keys=(), raw=False, interval=16):
+        '''
+        Initialize the front-coded keys.
+
+        Parameters:
+            - keys: the keys in ascending order, default is empty.
+            - raw: whether the keys are bytes (compact mode) rather than strings, default is False.
+            - interval: number of keys between two restart points, default is 16.
+        '''
+        self.raw = raw
+        self.interval = interval
+        self._encode([k if raw else k.encode('utf-8') for k in keys])
+
+    def _encode(self, keys):
+        '''Pack the given list of bytes keys into blocks of interval keys.'''
+        self.heads = []
+        self.blocks = []
+        self.starts = []  # the index of the first key of each block
+        for i in range(0, len(keys), self.interval):
+            self.heads.append(keys[i])
+            self.blocks.append(_pack(keys[i:i + self.interval]))
+            self.starts.append(i)
+        self.n = len(keys)
+        self._cache = None  # (index, block, offset of the next entry, key) of the last decoded key
+
+    def _block_keys(self, b):
+        '''Decode the keys of block b as a list of bytes.'''
+        key = self.heads[b]
+        keys = [key]
+        data = self.blocks[b]
+        pos = 0
+        while pos < len(data):
+            key, pos = _decode_at(data, pos, key)
+            keys.append(key)
+        return keys
+
+    def _set_block(self, b, keys, shift):
+        '''
+        Replace the keys of block b by keys, splitting or dropping the block as needed.
+
+        Parameters:
+            - shift: the change in the number of keys, added to the starts of the later blocks.
+        '''
+        if not keys:
+            del self.heads[b], self.blocks[b], self.starts[b]
+        elif len(keys) > 2 * self.interval:
+            half = len(keys) // 2
+            self.heads[b:b + 1] = [keys[0], keys[half]]
+            self.blocks[b:b + 1] = [_pack(keys[:half]), _pack(keys[half:])]
+            self.starts.insert(b + 1, self.starts[b] + half)
+            b += 1
+        else:
+            self.heads[b] = keys[0]
+            self.blocks[b] = _pack(keys)
+        starts = self.starts
+        for c in range(b + 1 if keys else b, len(starts)):
+            starts[c] += shift
+        self.n += shift
+        self._cache = None
+
+    def _block_of(self, i):
+        '''The block holding the i-th key.'''
+        return bisect_right(self.starts, i) - 1
+
+    def _key(self, i):
+        '''Decode the i-th key as bytes.'''
+        cache = self._cache
+        if cache is not None and cache[0] == i:
+            return cache[3]
+        b = self._block_of(i)
+        j = i - self.starts[b]
+        if j == 0:
+            return self.heads[b]
+        if cache is not None and cache[0] == i - 1 and cache[1] == b:
+            key, pos = _decode_at(self.blocks[b], cache[2], cache[3])  # sequential access
+        else:
+            key, pos = self.heads[b], 0
+            while j > 0:
+                key, pos = _decode_at(self.blocks[b], pos, key)
+                j -= 1
+        self._cache = (i, b, pos, key)
+        return key
+
+    def _decode_all(self):
+        '''Decode all the keys as a list of bytes.'''
+        keys = []
+        for b in range(len(self.blocks)):
+            keys.extend(self._block_keys(b))
+        return keys
+
+    def _out(self, key):
+        return key if self.raw else key.decode('utf-8')
+
+    def _in(self, key):
+        return key if self.raw else key.encode('utf-8')
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        for b in range(len(self.blocks)):
+            for key in self._block_keys(b):
+                yield self._out(key)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return FrontCodedKeys(list(self)[i], self.raw, self.interval)
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError('FrontCodedKeys index out of range')
+        return self._out(self._key(i))
+
+    def __setitem__(self, i, value):
+        if isinstance(i, slice):
+            keys = self._decode_all()
+            keys[i] = [self._in(k) for k in value]
+            self._encode(keys)
+            return
+        if i < 0:
+            i += self.n
+        b = self._block_of(i)
+        keys = self._block_keys(b)
+        keys[i - self.starts[b]] = self._in(value)
+        self._set_block(b, keys, 0)
+
+    def __repr__(self):
+        return f'FrontCodedKeys({list(self)!r})'
+
+    def insert(self, i, key):
+        if i < 0:
+            i = max(0, i + self.n)
+        i = min(i, self.n)
+        if not self.blocks:
+            self._encode([self._in(key)])
+            return
+        b = self._block_of(i) if i < self.n else len(self.blocks) - 1  # only block b changes
+        keys = self._block_keys(b)
+        keys.insert(i - self.starts[b], self._in(key))
+        self._set_block(b, keys, 1)
+
+    def append(self, key):
+        self.insert(self.n, key)
+
+    def extend(self, keys):
+        self._encode(self._decode_all() + [self._in(k) for k in keys])
+
+    def pop(self, i=-1):
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError('pop index out of range')
+        b = self._block_of(i)  # only block b changes
+        keys = self._block_keys(b)
+        key = keys.pop(i - self.starts[b])
+        self._set_block(b, keys, -1)
+        return self._out(key)
+
+    def bisect_left(self, key):
+        '''
+        Find the smallest i such that key <= self[i], or len(self) if there is none.
+        '''
+        key = self._in(key)
+        b = bisect_left(self.heads, key)  # the block before b is the last one starting below key
+        if b == 0:
+            return 0
+        b -= 1
+        i = self.starts[b] + 1
+        data = self.blocks[b]
+        prev, pos = self.heads[b], 0
+        while pos < len(data):  # scan the block, decoding keys one after another
+            k, pos = _decode_at(data, pos, prev)
+            if k >= key:
+                self._cache = (i, b, pos, k)
+                return i
+            prev = k
+            i += 1
+        return i
+
+
+def _pack(keys):
+    '''Pack the keys of a block after the first one, each relative to the key before it.'''
+    data = bytearray()
+    prev = keys[0]
+    for k in keys[1:]:
+        # binary search the length of the prefix shared with the previous key
+        lo, hi = 0, min(len(prev), len(k))
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if prev[:mid] == k[:mid]:
+                lo = mid
+            else:
+                hi = mid - 1
+        _put_varint(data, lo)
+        _put_varint(data, len(k) - lo)
+        data += k[lo:]
+        prev = k
+    return bytes(data)
+
+
+def _decode_at(data, pos, prev):
+    '''
+    Decode the entry starting at byte offset pos of a block, prev being the previous key.
+
+    Returns:
+        - (key, offset of the next entry).
+    '''
+    shared = data[pos]
+    if shared < 0x80:
+        pos += 1
+    else:
+        shared, pos = _get_varint(data, pos)
+    length = data[pos]
+    if length < 0x80:
+        pos += 1
+    else:
+        length, pos = _get_varint(data, pos)
+    return prev[:shared] + data[pos:pos + length], pos + length
+
+
+def _put_varint(data, x):
+    '''Append the non-negative integer x to data as a LEB128 varint.'''
+    while x >= 0x80:
+        data.append((x & 0x7f) | 0x80)
+        x >>= 7
+    data.append(x)
+
+
+def _get_varint(data, pos):
+    '''
+    Read a LEB128 varint from data at offset pos.
+
+    Returns:
+        - (value, offset after the varint).
+    '''
+    x = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        x |= (b & 0x7f) << shift
+        if b < 0x80:
+            return x, pos
+        shift += 7
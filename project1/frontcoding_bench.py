@@ -0,0 +1,41 @@
+import random
+import time
+import tracemalloc
+from b_tree import BTree
+from freeze_bench import load_words
+
+
+def build(t, compress_leaves, lines):
+    '''Build a B-tree from the given "word meaning" lines and measure the memory taken by its keys.'''
+    tracemalloc.start()
+    bt = BTree(t, compress_leaves=compress_leaves)
+    for line in lines:
+        en, cn = line.split(' ')
+        bt.insertb(en, None)  # leave the values out to measure the keys alone
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return bt, memory
+
+
+if __name__ == "__main__":
+    words = load_words('./project1/1_initial.txt', 10)
+    random.seed(0)
+    random.shuffle(words)
+    lines = [f'{en} {cn}' for en, cn in words]
+    queries = [en for en, _ in random.sample(words, 20000)]
+    print(f'n = {len(words)}')
+    for t in [10, 64, 256]:
+        for compress_leaves in [False, True]:
+            bt, memory = build(t, compress_leaves, lines)
+            start = time.perf_counter()
+            bt = BTree(t, compress_leaves=compress_leaves)
+            for en, _ in words:
+                bt.insertb(en, None)
+            time_build = time.perf_counter() - start
+            start = time.perf_counter()
+            for q in queries:
+                bt.search(q)
+            time_lookup = time.perf_counter() - start
+            name = 'front-coded' if compress_leaves else 'plain'
+            print(f'  t={t:3d} {name:11s} memory {memory / len(words):6.1f} B/key, '
+                  f'build {time_build:.3f}s, lookup x{len(queries)} {time_lookup:.4f}s')
@@ -0,0 +1,108 @@
+class FrozenDict:
+    '''
+    An immutable, array-backed snapshot of a dictionary tree.
+
+    The sorted keys are laid out in Eytzinger (BFS) order, i.e. the implicit complete
+    binary search tree whose root is at index 1 and whose node k has children 2k and 2k+1.
+    A search then walks one flat list instead of chasing RBNode/BTNode pointers, and the
+    first few levels touched by every lookup sit next to each other in memory.
+    '''
+    def __init__(self, items):
+        '''
+        Build the snapshot from a sorted list of (key, value) tuples.
+
+        Parameters:
+            - items: (English word, Chinese translation) tuples in ascending key order,
+              e.g. the output of RedBlackTree.inorder() or BTree.inorder().
+        '''
+        self.n = len(items)
+        self.keys = [None] * (self.n + 1)  # index 0 is unused
+        self.values = [None] * (self.n + 1)
+        self._fill(items, 0, 1)
+
+    def _fill(self, items, i, k):
+        '''
+        Place items[i:] into the implicit tree rooted at k by an in-order walk.
+
+        Returns:
+            - the index of the next item to place.
+        '''
+        stack = []
+        while stack or k <= self.n:
+            if k <= self.n:  # go as far left as possible
+                stack.append(k)
+                k = 2 * k
+            else:
+                k = stack.pop()
+                self.keys[k], self.values[k] = items[i]
+                i += 1
+                k = 2 * k + 1
+        return i
+
+    def __len__(self):
+        return self.n
+
+    def _lower_bound(self, key):
+        '''
+        Find the position of the smallest key that is not less than the given key.
+
+        Returns:
+            - the Eytzinger index of that key, 0 if all keys are less than the given key.
+        '''
+        keys = self.keys
+        n = self.n
+        k = 1
+        while k <= n:
+            k = 2 * k + (keys[k] < key)  # go right if keys[k] < key
+        # cancel the right turns taken after the last left turn, plus that left turn
+        return k >> ((~k & (k + 1)).bit_length())
+
+    def _next(self, k):
+        '''
+        Find the in-order successor of the Eytzinger index k, 0 if k holds the maximum.
+        '''
+        if 2 * k + 1 <= self.n:  # leftmost node in the right subtree
+            k = 2 * k + 1
+            while 2 * k <= self.n:
+                k = 2 * k
+            return k
+        while k & 1:  # climb while k is a right child
+            k >>= 1
+        return k >> 1
+
+    def singlesearch(self, word):
+        '''
+        Search for the given English word. Return the Chinese translation if found, otherwise return "Word not found!".
+        '''
+        k = self._lower_bound(word)
+        if k and self.keys[k] == word:
+            return self.values[k]
+        return "Word not found!"
+
+    def rangesearch(self, low, high):
+        '''
+        Search for words in the specified range [low, high].
+
+        Returns:
+            - A list of tuples, each tuple contains a word and its meaning.
+        '''
+        result = []
+        k = self._lower_bound(low)
+        while k and self.keys[k] <= high:
+            result.append((self.keys[k], self.values[k]))
+            k = self._next(k)
+        return result
+
+    def prefixsearch(self, prefix):
+        '''
+        Search for words starting with the given prefix.
+
+        Returns:
+            - A list of tuples, each tuple contains a word and its meaning.
+        '''
+        result = []
+        k = self._lower_bound(prefix)
+        while k and self.keys[k].startswith(prefix):
+            result.append((self.keys[k], self.values[k]))
+            k = self._next(k)
+        return result
@@ -0,0 +1,51 @@
+import random
+import time
+from rb_tree import RedBlackTree, RBNode, join, split, union, from_sorted, build_parallel
+from freeze_bench import load_words
+
+
+def insert_all(items):
+    tree = RedBlackTree()
+    for en, cn in items:
+        tree.insertrb(RBNode(en, cn))
+    return tree
+
+
+if __name__ == "__main__":
+    words = load_words('./project1/1_initial.txt', 100)
+    random.seed(0)
+    random.shuffle(words)
+    print(f'n = {len(words)}')
+
+    # merge a shard into the dictionary: re-inserting every entry vs union
+    for m in [100, 10000, len(words) // 2]:
+        big, small = sorted(words[m:]), sorted(words[:m])
+        t1, t2 = from_sorted(big), from_sorted(small)
+        start = time.perf_counter()
+        for en, cn in small:
+            t1.insertrb(RBNode(en, cn))
+        time_insert = time.perf_counter() - start
+        t1, t2 = from_sorted(big), from_sorted(small)
+        start = time.perf_counter()
+        merged = union(t1, t2)
+        time_union = time.perf_counter() - start
+        assert merged.size == len(words)
+        print(f'  merge {m} into {len(words) - m}: re-insert {time_insert:.4f}s, union {time_union:.4f}s')
+
+    # split and join back
+    tree = from_sorted(sorted(words))
+    queries = [en for en, _ in random.sample(words, 1000)]
+    start = time.perf_counter()
+    for q in queries:
+        t1, node, t2 = split(tree, q)
+        tree = join(t1, node, t2)
+    print(f'  split + join x{len(queries)}: {time.perf_counter() - start:.4f}s')
+
+    # build from scratch: sequential insertion vs worker processes
+    start = time.perf_counter()
+    insert_all(words)
+    print(f'  build by insertion: {time.perf_counter() - start:.4f}s')
+    for workers in [1, 2, 4, 8]:
+        start = time.perf_counter()
+        tree = build_parallel(words, workers)
+        print(f'  build_parallel with {workers} workers: {time.perf_counter() - start:.4f}s')
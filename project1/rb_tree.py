@@ -1,5 +1,9 @@
 import os
 import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from frozen_dict import FrozenDict
+from arena import StringArena
 
 class RBNode:
     RED = 0
@@ -61,10 +65,60 @@ class RBNode:
         color = "RED" if self.is_red() else "BLACK"
         return str(self.key) + ':' + str(self.value) + color
 
+class _NilNode(RBNode):
+    '''
+    The nil sentinel, shared by all red-black trees so that join/split can move nodes between trees.
+    '''
+    def __reduce__(self):
+        '''Pickle as a reference to the shared sentinel, e.g. when a tree is returned by a worker process.'''
+        return 'NIL'
+
+NIL = _NilNode(None, None, RBNode.BLACK)
+
 class RedBlackTree:
-    def __init__(self):
-        self.nil = RBNode(None, None, RBNode.BLACK)
+    def __init__(self, compact=False):
+        '''
+        Initialize a red-black tree.
+        
+        Parameters:
+            - compact: whether to store the words in compact form, default is False.
+              In compact mode node keys are UTF-8 encoded bytes, compared as bytes (which
+              keeps the alphabetical order), and node values are handles into a shared
+              StringArena in which duplicate translations are stored only once.
+              Words are encoded and decoded by the word-level methods (initialize, batch_op,
+              insert_word, delete_word, rangesearch, singlesearch, inorder), while
+              search/insertrb/deleterb work on the stored form.
+        '''
+        self.nil = NIL
         self.root = self.nil
+        self._size = 0  # number of nodes in the tree, None if unknown after split/union
+        self.compact = compact
+        self.arena = StringArena() if compact else None
+    
+    @property
+    def size(self):
+        '''
+        The number of nodes in the tree, counted on demand after split or union.
+        '''
+        if self._size is None:
+            self._size = len(self._inorder_nodes())
+        return self._size
+    
+    def _encode_key(self, word):
+        '''Convert an English word into the stored key.'''
+        return word.encode('utf-8') if self.compact else word
+    
+    def _encode_value(self, meaning):
+        '''Convert a Chinese translation into the stored value.'''
+        return self.arena.add(meaning) if self.compact else meaning
+    
+    def _decode_key(self, key):
+        '''Convert a stored key back into the English word.'''
+        return key.decode('utf-8') if self.compact else key
+    
+    def _decode_value(self, value):
+        '''Convert a stored value back into the Chinese translation.'''
+        return self.arena.decode(value) if self.compact else value
         
     def search(self, x, key):
         '''
@@ -214,6 +268,8 @@ class RedBlackTree:
         z.right = self.nil
         z.set_red()  # set z's color to red
         self._insert_fixup(z)  # correct violation of red-black properties
+        if self._size is not None:
+            self._size += 1
         return True
     
     def _insert_fixup(self, z):
@@ -222,6 +278,9 @@ class RedBlackTree:
         
         Parameters:
             - z: the node inserted into the tree.
+        
+        Returns:
+            - True if the root had to be recolored black, i.e. the black height grew by one.
         '''
         while z.parent.is_red():  # z's parent is red
             if z.parent.parent is self.nil:  # z's parent is the root
@@ -254,7 +313,9 @@ class RedBlackTree:
                     z.parent.set_black()
                     z.parent.parent.set_red()
                     self._left_rotate(z.parent.parent)
+        grew = self.root.is_red()
         self.root.set_black()
+        return grew
 
     def deleterb(self, z):
         '''
@@ -290,6 +351,8 @@ class RedBlackTree:
             y.color = z.color
         if y_original_color == RBNode.BLACK:
             self._delete_fixup(x)
+        if self._size is not None:
+            self._size -= 1
         return True
     
     def _transplant(self, u, v):
@@ -379,7 +442,7 @@ class RedBlackTree:
         elif file is not None:
             if node is not self.nil:
                 color = "BLACK" if node.is_black() else "RED"
-                file.write(f'level={level} child={child} {node.key}({color})\n')
+                file.write(f'level={level} child={child} {self._decode_key(node.key)}({color})\n')
                 self.preorder_print(node.left, level + 1, 0, output_file, file)
                 self.preorder_print(node.right, level + 1, 1, output_file, file)
             else:
@@ -387,7 +450,7 @@ class RedBlackTree:
         else:
             if node is not self.nil:
                 color = "BLACK" if node.is_black() else "RED"
-                print(f'level={level} child={child} {node.key}({color})')
+                print(f'level={level} child={child} {self._decode_key(node.key)}({color})')
                 self.preorder_print(node.left, level + 1, 0)
                 self.preorder_print(node.right, level + 1, 1)
             else:
@@ -414,7 +477,7 @@ class RedBlackTree:
                 for index, line in enumerate(lines[1:], start=1):
                     word = line.strip().split(' ')
                     if len(word) == 2:
-                        self.insertrb(RBNode(word[0], word[1]))
+                        self.insertrb(RBNode(self._encode_key(word[0]), self._encode_value(word[1])))
                     else:
                         return []
                     
@@ -446,7 +509,7 @@ class RedBlackTree:
                 for index, line in enumerate(lines[1:], start=1):
                     word = line.strip().split(' ')
                     if len(word) == 2:
-                        self.insertrb(RBNode(word[0], word[1]))
+                        self.insertrb(RBNode(self._encode_key(word[0]), self._encode_value(word[1])))
                     else:
                         return []
                     
@@ -475,7 +538,7 @@ class RedBlackTree:
         '''
         Insert a word into the red-black tree.
         '''
-        if self.insertrb(RBNode(en, cn)):
+        if self.insertrb(RBNode(self._encode_key(en), self._encode_value(cn))):
             return "Insertion succeeded."
         else:
             return f"\"{en}\" already exists!"
@@ -484,13 +547,312 @@ class RedBlackTree:
         '''
         Delete a word from the red-black tree.
         '''
-        z = self.search(self.root, en)
+        z = self.search(self.root, self._encode_key(en))
         if z is self.nil:
             return f"\"{en}\" not found!"
         else:
             self.deleterb(z)
             return "Deletion succeeded."
     
+    def delete_range(self, low, high):
+        '''
+        Delete all words in the specified range [low, high].
+        
+        The tree is split at low and at high and the two outer parts are joined back,
+        which takes O(log n) time plus the time to count the k deleted words.
+        
+        Returns:
+            - The number of words deleted.
+        '''
+        low, high = self._encode_key(low), self._encode_key(high)
+        if high < low:
+            return 0
+        l, hl, a, r, hr = self._split(self.root, self._black_height(self.root), low)
+        m, _, b, r, hr = self._split(r, hr, high)
+        count = len(self._inorder_nodes(m)) + (a is not None) + (b is not None)
+        self._join2(l, hl, r, hr)
+        if self._size is not None:
+            self._size -= count
+        return count
+    
+    def delete_batch(self, words):
+        '''
+        Delete the given words in a single descent of the tree.
+        
+        A few words are looked up in one traversal and their nodes deleted one by one, each
+        deletion fixing the colors on its way back up in O(1) amortized rotations. Many words
+        are deleted by splitting the tree around them and joining the rest back, which takes
+        O(k log(n/k + 1)) time for k words and beats k separate fixups once k is a fair
+        fraction of n.
+        
+        Parameters:
+            - words: the English words to delete, in any order. Words not in the tree are ignored.
+        
+        Returns:
+            - The number of words deleted.
+        '''
+        keys = sorted(set(self._encode_key(word) for word in words))
+        if not keys or self.root is self.nil:
+            return 0
+        if len(keys) * self.size.bit_length() < 6 * self.size:  # constant measured by delete_bench.py
+            nodes = []
+            self._collect_keys(self.root, keys, 0, len(keys), nodes)
+            for z in nodes:
+                self.deleterb(z)
+            return len(nodes)
+        root, _, count = self._delete_sorted(self.root, self._black_height(self.root), keys, 0, len(keys))
+        self.root = root
+        if self._size is not None:
+            self._size -= count
+        return count
+    
+    def _collect_keys(self, x, keys, lo, hi, nodes):
+        '''
+        Append the nodes of the subtree rooted at x whose keys are in keys[lo:hi] to nodes.
+        
+        Parameters:
+            - x: the root of the subtree.
+            - keys: the sorted keys to look for.
+            - lo, hi: only keys[lo:hi] can be in the subtree rooted at x.
+            - nodes: list to store the nodes found.
+        '''
+        if x is self.nil or lo >= hi:
+            return
+        mid = bisect_left(keys, x.key, lo, hi)  # keys[lo:mid] are in the left subtree
+        self._collect_keys(x.left, keys, lo, mid, nodes)
+        if mid < hi and keys[mid] == x.key:
+            nodes.append(x)
+            mid += 1
+        self._collect_keys(x.right, keys, mid, hi, nodes)
+    
+    def _delete_sorted(self, x, hx, keys, lo, hi):
+        '''
+        Delete keys[lo:hi] from the subtree rooted at x.
+        
+        The keys are partitioned around x, deleted from both subtrees, and the results are
+        joined back with x in between, or without it if its key is deleted. Only the nodes on
+        the paths to the keys are visited, and deleting k keys takes O(k log(n/k + 1)) time.
+        
+        Parameters:
+            - x: the root, black, of the subtree, not nil.
+            - hx: the black height of x.
+            - keys: the sorted keys to delete, keys not in the tree are ignored.
+            - lo, hi: only keys[lo:hi] can be in the subtree rooted at x, lo < hi.
+        
+        Returns:
+            - (root, black height, number of keys deleted) of the remaining tree.
+        '''
+        mid = bisect_left(keys, x.key, lo, hi)  # keys[lo:mid] are in the left subtree
+        found = mid < hi and keys[mid] == x.key
+        l, hl = self._detach(x.left, hx - 1)
+        r, hr = self._detach(x.right, hx - 1)
+        x.left = x.right = x.parent = self.nil
+        cl = cr = 0
+        if lo < mid and l is not self.nil:
+            l, hl, cl = self._delete_sorted(l, hl, keys, lo, mid)
+        if mid + found < hi and r is not self.nil:
+            r, hr, cr = self._delete_sorted(r, hr, keys, mid + found, hi)
+        if found:
+            root, h = self._join2(l, hl, r, hr)
+        else:
+            root, h = self._join(l, hl, x, r, hr)
+        return root, h, cl + cr + found
+    
+    def _inorder_nodes(self, x=None):
+        '''
+        Return the list of nodes of the subtree rooted at x in order, default is the whole tree.
+        '''
+        result = []
+        stack = []
+        if x is None:
+            x = self.root
+        while stack or x is not self.nil:
+            if x is not self.nil:
+                stack.append(x)
+                x = x.left
+            else:
+                x = stack.pop()
+                result.append(x)
+                x = x.right
+        return result
+    
+    def _build(self, nodes):
+        '''
+        Relink the given nodes, sorted by key, into a balanced red-black tree.
+        
+        The middle node of every range becomes the root of its subtree, so all nil leaves
+        are at depth h or h+1. Coloring the nodes at depth h red and all others black then
+        gives every path the same black height.
+        '''
+        n = len(nodes)
+        h = (n + 1).bit_length() - 1  # floor(log2(n+1))
+        self.root = self._build_subtree(nodes, 0, n, 0, h, self.nil)
+        self.root.set_black()
+        self._size = n
+    
+    def _build_subtree(self, nodes, lo, hi, depth, h, parent):
+        '''
+        Build the subtree from nodes[lo:hi] at the given depth, return its root.
+        '''
+        if lo >= hi:
+            return self.nil
+        mid = (lo + hi) // 2
+        x = nodes[mid]
+        x.parent = parent
+        x.color = RBNode.RED if depth == h else RBNode.BLACK
+        x.left = self._build_subtree(nodes, lo, mid, depth + 1, h, x)
+        x.right = self._build_subtree(nodes, mid + 1, hi, depth + 1, h, x)
+        return x
+    
+    def _black_height(self, x):
+        '''
+        Count the black nodes on a path from x down to a leaf, nil excluded.
+        '''
+        h = 0
+        while x is not self.nil:
+            if x.is_black():
+                h += 1
+            x = x.left
+        return h
+    
+    def _join(self, l, hl, z, r, hr):
+        '''
+        Join the subtrees rooted at l and r with node z in between, making the result the tree's root.
+        
+        Parameters:
+            - l, r: roots of valid red-black trees with black roots, all keys in l < z.key < all keys in r.
+            - hl, hr: black heights of l and r.
+            - z: the node to put between l and r.
+        
+        Returns:
+            - (root, black height) of the joined tree.
+        
+        z is hung, as a red node, where the spine of the taller tree reaches the black height
+        of the shorter one, and the red-black properties are restored as after an insertion,
+        which takes O(|hl - hr| + 1) time.
+        '''
+        p = self.nil
+        if hl >= hr:
+            y, h = l, hl
+            while not (y.is_black() and h == hr):  # walk down the right spine of l
+                if y.is_black():
+                    h -= 1
+                p, y = y, y.right
+            z.left, z.right = y, r
+            if p is self.nil:
+                self.root = z
+            else:
+                p.right = z
+                self.root = l
+            if r is not self.nil:
+                r.parent = z
+        else:
+            y, h = r, hr
+            while not (y.is_black() and h == hl):  # walk down the left spine of r
+                if y.is_black():
+                    h -= 1
+                p, y = y, y.left
+            z.left, z.right = l, y
+            if p is self.nil:
+                self.root = z
+            else:
+                p.left = z
+                self.root = r
+            if l is not self.nil:
+                l.parent = z
+        if y is not self.nil:
+            y.parent = z
+        z.parent = p
+        z.set_red()
+        self.root.parent = self.nil
+        grew = self._insert_fixup(z)
+        return self.root, max(hl, hr) + grew
+    
+    def _join2(self, l, hl, r, hr):
+        '''
+        Join the subtrees rooted at l and r, all keys in l being less than all keys in r.
+        
+        Returns:
+            - (root, black height) of the joined tree, which becomes the tree's root.
+        '''
+        if r is self.nil:
+            self.root = l
+            return l, hl
+        rest = RedBlackTree()  # take the minimum of r out to join l and r with it
+        rest.root = r
+        rest._size = None
+        z = rest.minrb(r)
+        rest.deleterb(z)
+        return self._join(l, hl, z, rest.root, rest._black_height(rest.root))
+    
+    def _detach(self, x, h):
+        '''
+        Turn the subtree rooted at x into a standalone tree with a black root.
+        
+        Parameters:
+            - h: the black height of x as a child, i.e. not counting x if x is red.
+        
+        Returns:
+            - (x, black height of the standalone tree).
+        '''
+        if x is self.nil:
+            return x, 0
+        x.parent = self.nil
+        if x.is_red():
+            x.set_black()
+            h += 1
+        return x, h
+    
+    def _split(self, x, hx, key):
+        '''
+        Split the subtree rooted at x around key.
+        
+        Parameters:
+            - x: the root, black, of the subtree to split.
+            - hx: the black height of x.
+            - key: the key to split around.
+        
+        Returns:
+            - (l, hl, found, r, hr): the roots and black heights of the trees holding the keys
+              less than and greater than key, and the node with the given key or None.
+        '''
+        if x is self.nil:
+            return self.nil, 0, None, self.nil, 0
+        l, hl = self._detach(x.left, hx - 1)
+        r, hr = self._detach(x.right, hx - 1)
+        x.left = x.right = x.parent = self.nil
+        if key == x.key:
+            return l, hl, x, r, hr
+        if key < x.key:
+            ll, hll, found, lr, hlr = self._split(l, hl, key)
+            r, hr = self._join(lr, hlr, x, r, hr)
+            return ll, hll, found, r, hr
+        else:
+            rl, hrl, found, rr, hrr = self._split(r, hr, key)
+            l, hl = self._join(l, hl, x, rl, hrl)
+            return l, hl, found, rr, hrr
+    
+    def _union(self, a, ha, b, hb):
+        '''
+        Merge the subtrees rooted at a and b, keeping the node of a when a key is in both.
+        
+        Returns:
+            - (root, black height) of the merged tree.
+        '''
+        if b is self.nil:
+            self.root = a
+            return a, ha
+        if a is self.nil:
+            self.root = b
+            return b, hb
+        al, hal = self._detach(a.left, ha - 1)
+        ar, har = self._detach(a.right, ha - 1)
+        a.left = a.right = a.parent = self.nil
+        bl, hbl, _, br, hbr = self._split(b, hb, a.key)
+        l, hl = self._union(al, hal, bl, hbl)
+        r, hr = self._union(ar, har, br, hbr)
+        return self._join(l, hl, a, r, hr)
+    
     def rangesearch(self, low, high, x=None, result=None):
         '''
         Search for words in the specified range [low, high].
@@ -506,13 +868,14 @@ class RedBlackTree:
         '''
         if x is None:
             x = self.root
+            low, high = self._encode_key(low), self._encode_key(high)
         if result is None:
             result = []
         
         if x is not self.nil:
             self.rangesearch(low, high, x.left, result)
             if low <= x.key <= high:
-                result.append((x.key, x.value))
+                result.append((self._decode_key(x.key), self._decode_value(x.value)))
             self.rangesearch(low, high, x.right, result)
         
             
@@ -522,12 +885,155 @@ class RedBlackTree:
         '''
         Search for the given English word in the red-black tree.
         '''
-        node = self.search(self.root, word)
-        if node:
-            return node.value
+        node = self.search(self.root, self._encode_key(word))
+        if node is not self.nil:
+            return self._decode_value(node.value)
         else:
             return "Word not found!"
 
+    def inorder(self):
+        '''
+        Traverse the red-black tree in order.
+        
+        Returns:
+            - A list of tuples (word, meaning) in ascending order of words.
+        '''
+        result = []
+        stack = []
+        x = self.root
+        while stack or x is not self.nil:
+            if x is not self.nil:
+                stack.append(x)
+                x = x.left
+            else:
+                x = stack.pop()
+                result.append((self._decode_key(x.key), self._decode_value(x.value)))
+                x = x.right
+        return result
+    
+    def freeze(self):
+        '''
+        Take a read-only snapshot of the red-black tree for lookup-heavy workloads.
+        
+        Returns:
+            - A FrozenDict supporting singlesearch, rangesearch and prefixsearch.
+        '''
+        return FrozenDict(self.inorder())
+
+
+def _shares_arena(t1, t2):
+    '''Check that nodes of t1 and t2 can live in one tree, i.e. their values are stored alike.'''
+    if t1.compact != t2.compact or (t1.compact and t1.arena is not t2.arena):
+        raise ValueError("Trees with different storage cannot be combined.")
+
+
+def _empty_like(tree):
+    '''Create an empty tree storing its words like the given tree.'''
+    result = RedBlackTree(tree.compact)
+    result.arena = tree.arena
+    return result
+
+
+def join(t1, k, t2):
+    '''
+    Join two red-black trees with a node in between in O(log n) time.
+    
+    Parameters:
+        - t1: the tree whose keys are all less than k.key.
+        - k: the RBNode to put between the two trees, its key and value stored like those of t1.
+        - t2: the tree whose keys are all greater than k.key.
+    
+    Returns:
+        - The joined tree. t1 and t2 are left empty, their nodes having moved into it.
+    '''
+    _shares_arena(t1, t2)
+    tree = _empty_like(t1)
+    tree._join(t1.root, tree._black_height(t1.root), k, t2.root, tree._black_height(t2.root))
+    tree._size = None if t1._size is None or t2._size is None else t1._size + 1 + t2._size
+    t1.root = t2.root = NIL
+    t1._size = t2._size = 0
+    return tree
+
+
+def split(tree, key):
+    '''
+    Split a red-black tree around an English word in O(log n) time.
+    
+    Returns:
+        - (t1, node, t2): the trees holding the words less than and greater than key,
+          and the RBNode holding key, None if key is not in the tree.
+          The given tree is left empty, its nodes having moved into t1 and t2.
+    '''
+    t1, t2 = _empty_like(tree), _empty_like(tree)
+    l, _, found, r, _ = tree._split(tree.root, tree._black_height(tree.root), tree._encode_key(key))
+    t1.root, t2.root = l, r
+    t1._size = t2._size = None
+    tree.root = NIL
+    tree._size = 0
+    return t1, found, t2
+
+
+def union(t1, t2):
+    '''
+    Merge two red-black trees in O(m log(n/m + 1)) time for sizes m <= n.
+    
+    Returns:
+        - The merged tree, keeping the meaning from t1 for words in both trees.
+          t1 and t2 are left empty, their nodes having moved into it.
+    '''
+    _shares_arena(t1, t2)
+    tree = _empty_like(t1)
+    tree._union(t1.root, tree._black_height(t1.root), t2.root, tree._black_height(t2.root))
+    tree._size = None
+    t1.root = t2.root = NIL
+    t1._size = t2._size = 0
+    return tree
+
+
+def from_sorted(items):
+    '''
+    Build a red-black tree from (word, meaning) tuples in ascending order of words, in O(n) time.
+    '''
+    tree = RedBlackTree()
+    nodes = []
+    for en, cn in items:
+        node = RBNode(en, cn, left=NIL, right=NIL, parent=NIL)
+        nodes.append(node)
+    tree._build(nodes)
+    return tree
+
+
+def build_parallel(items, workers=4):
+    '''
+    Build a red-black tree from (word, meaning) tuples with several worker processes.
+    
+    The sorted words are cut into one slice per worker with a single word between two
+    slices, each worker builds the tree of its slice, and the trees are joined with the
+    words in between.
+    
+    Parameters:
+        - items: (word, meaning) tuples in any order, the last meaning is kept for repeated words.
+        - workers: number of worker processes, default is 4.
+    '''
+    items = sorted(dict(items).items())
+    if workers <= 1 or len(items) < 2 * workers:
+        return from_sorted(items)
+    size = (len(items) - (workers - 1)) // workers
+    chunks, separators = [], []
+    pos = 0
+    for j in range(workers):
+        end = pos + size if j < workers - 1 else len(items)
+        chunks.append(items[pos:end])
+        if j < workers - 1:
+            separators.append(items[end])
+        pos = end + 1
+    with ProcessPoolExecutor(workers) as executor:
+        trees = list(executor.map(from_sorted, chunks))
+    tree = trees[0]
+    for (en, cn), right in zip(separators, trees[1:]):
+        tree = join(tree, RBNode(en, cn), right)
+    return tree
+
 
 if __name__ == "__main__":
 
@@ -1,14 +1,28 @@
+import os
 import tkinter as tk
 from tkinter import messagebox, font
 from mainpj2 import Graph
+from spservice import ShortestPathService
+from spatial import SpatialIndex
 import tkinter.scrolledtext as scrolledtext
 
+try:
+    import graphfile  # the binary graph format needs NumPy
+except ImportError:
+    graphfile = None
+
 filepath = './edge.txt'
+# the binary form of filepath, faster to open, kept next to it; without NumPy filepath is parsed every time
+binpath = filepath + '.graph' if graphfile is not None else None
 map1 = Graph()
-map1.init_adjlist(filepath)
-map1.dijkstra_allpairs()
+if binpath and os.path.exists(binpath) and os.path.getmtime(binpath) >= os.path.getmtime(filepath):
+    map1.init_binary(binpath)
+else:
+    map1.init_adjlist(filepath)
+service = ShortestPathService(map1)  # shortest paths are computed on first use
 n = len(map1.v)
-alp = {chr(i + 65): i for i in range(26)}  # A-Z -> 0-25
+path_limit = 10  # the most shortest paths listed for a pair of locations
+alternatives = 2  # the most alternative routes shown besides the shortest path
 
 # main window
 root = tk.Tk()
@@ -54,6 +68,23 @@ points_data = {
     'Y': (621, 271),
     'Z': (627, 372)
 }
+map1.set_coords(points_data)
+if binpath and (not os.path.exists(binpath) or os.path.getmtime(binpath) < os.path.getmtime(filepath)):
+    map1.save_binary(binpath)
+
+
+def get_location(entry):
+    '''Read a vertex id from an entry, letting single letters be typed in lower case.'''
+    location = entry.get().strip()
+    return location if location in map1.index else location.upper()
+
+
+def draw_edge(u, v, color):
+    '''Draw the edge between the vertices with ids u and v, if both have a location on the map.'''
+    if u in points_data and v in points_data:
+        start_x, start_y = points_data[u]
+        end_x, end_y = points_data[v]
+        map_canvas.create_line(start_x, start_y, end_x, end_y, fill=color, width=4, tags="path_line")
 
 
 def clear_contents():
@@ -115,23 +146,17 @@ result_display = scrolledtext.ScrolledText(result_frame,
 result_display.pack()
 
 
-def create_clickable_areas(canvas, points):
-    for point, (x, y) in points.items():
-        canvas.create_rectangle(
-            x-8, y-8, x+8, y+8, outline="", fill="", tags=('clickable_area', point))
-
-
-
-create_clickable_areas(map_canvas, points_data)
+# the locations by position, to find the one nearest to a click
+location_index = SpatialIndex.of_vertices(points_data)
+snap_radius = 15  # the farthest a click may be from a location to select it
 
 
 def point_selected(event):
     click_x = map_canvas.canvasx(event.x)
     click_y = map_canvas.canvasy(event.y)
-    selected = map_canvas.find_closest(click_x, click_y, halo=10)
-    tags = map_canvas.gettags(selected)
-    if 'clickable_area' in tags:
-        point_id = tags[1]
+    nearest = location_index.nearest(click_x, click_y)
+    if nearest and nearest[0][1] <= snap_radius:
+        point_id = nearest[0][0]
         if location_entry_1.get() == "":
             location_entry_1.insert(0, point_id)
         elif location_entry_2.get() == "":
@@ -141,10 +166,12 @@ def point_selected(event):
                 "Selection Full", "Two locations are already selected.")
 
 
-map_canvas.tag_bind('clickable_area', '<Button-1>', point_selected)
+map_canvas.bind('<Button-1>', point_selected)
 
 
 def h_loc(location):
+    if location is None:  # the vertex has no location on the map
+        return
     x, y = location
     size = 20  # Size of the triangle
     points = [x, y, x + size, y + size, x - size, y + size]
@@ -153,25 +180,32 @@ def h_loc(location):
 
 def operation1():
     op_clear()
-    start_id = location_entry_1.get().upper()
-    end_id = location_entry_2.get().upper()
-    if start_id in points_data and end_id in points_data:
-        h_loc(points_data[start_id])
-        h_loc(points_data[end_id])
-        path_objects = map1.allpaths[alp[start_id]][alp[end_id]][0]
+    start_id = get_location(location_entry_1)
+    end_id = get_location(location_entry_2)
+    if start_id in map1.index and end_id in map1.index:
+        h_loc(points_data.get(start_id))
+        h_loc(points_data.get(end_id))
+        # the tree of start_id lists all the shortest paths below, so draw one of them from it too
+        path_objects = service.shortest_path(map1.vertex(start_id), map1.vertex(end_id))
+        if not path_objects:
+            result_display.insert(tk.END, service.get_pathstr(map1.vertex(start_id), map1.vertex(end_id)))
+            return
+        # the alternative routes first, so that the shortest path is drawn over them
+        routes = map1.alternative_routes(map1.vertex(start_id), map1.vertex(end_id), alternatives + 1)[1:]
+        for _, route in routes:
+            for i in range(len(route) - 1):
+                draw_edge(route[i].id, route[i + 1].id, "orange")
         path_points = [point.id for point in path_objects]
         for i in range(len(path_points) - 1):
-            start_point = path_points[i]
-            end_point = path_points[i + 1]
-            start_x, start_y = points_data[start_point]
-            end_x, end_y = points_data[end_point]
-            map_canvas.create_line(
-                start_x, start_y, end_x, end_y, fill="yellow", width=4, tags="path_line")
-
-        path_str = "Shortest path from {} to {}:\n {}".format(start_id, end_id, map1.get_pathstr(
-            map1.v[alp[start_id]], map1.v[alp[end_id]]))
+            draw_edge(path_points[i], path_points[i + 1], "yellow")
+
+        path_str = "Shortest path from {} to {}:\n {}".format(start_id, end_id, service.get_pathstr(
+            map1.vertex(start_id), map1.vertex(end_id), path_limit))
         path_length = "Path length: {}km".format(map1.calc_path(path_objects))
         result_display.insert(tk.END, f"{path_str}\n{path_length}")
+        for length, route in routes:
+            result_display.insert(tk.END, "\nAlternative: {} ({:.2f}km)".format(
+                '->'.join(u.id for u in route), length))
     else:
         messagebox.showerror(
             "Error", "Please select valid start and end points.")
@@ -179,24 +213,18 @@ def operation1():
 
 def operation2():
     op_clear()
-    location = location_entry_1.get().upper()
-    if location and location in alp:
-        h_loc(points_data[location])
-        map1.dijkstra(map1.v[alp[location]])
+    location = get_location(location_entry_1)
+    if location and location in map1.index:
+        h_loc(points_data.get(location))
         output_text = ""
-        for j in range(26):
-            end_location = chr(j + 65)
-            if end_location in alp:
-                path = map1.allpaths[alp[location]][alp[end_location]][0]
+        for end_location in map1.index:
+            path = service.shortest_path(map1.vertex(location), map1.vertex(end_location))
+            if path:
                 for k in range(len(path) - 1):
-                    start_point = path[k].id
-                    end_point = path[k + 1].id
-                    start_x, start_y = points_data[start_point]
-                    end_x, end_y = points_data[end_point]
-                    map_canvas.create_line(
-                        start_x, start_y, end_x, end_y, fill="purple", width=4, tags="path_line")
-                path_str = "Shortest path from {} to {}:\n {}".format(
-                    end_location, location, map1.get_pathstr(map1.v[alp[end_location]], map1.v[alp[location]]))
+                    draw_edge(path[k].id, path[k + 1].id, "purple")
+                # the map is undirected, so the paths back to location all come from its tree
+                path_str = "Shortest path from {} to {}:\n {}".format(end_location, location, service.get_pathstr(
+                    map1.vertex(location), map1.vertex(end_location), path_limit, reverse=True))
                 path_length = "Path length: {}km".format(map1.calc_path(path))
                 output_text += f"{path_str}\n{path_length}\n"
         result_display.insert(tk.END, output_text)
@@ -206,18 +234,18 @@ def operation2():
 
 def operation3():
     op_clear()
-    location = location_entry_1.get().upper()
+    location = get_location(location_entry_1)
     if location:
-        h_loc(points_data[location])
-        mst = map1.mst_prim(map1.v[alp[location]])
+        if location not in map1.index:
+            messagebox.showerror("Error", "Please enter a valid start location.")
+            return
+        h_loc(points_data.get(location))
+        mst = map1.mst_prim(map1.vertex(location))
     else:
         mst = map1.mst_kruskal()
 
     for u, v, _ in mst:
-        start_x, start_y = points_data[u.id]
-        end_x, end_y = points_data[v.id]
-        map_canvas.create_line(start_x, start_y, end_x,
-                               end_y, fill="blue", width=4, tags="path_line")
+        draw_edge(u.id, v.id, "blue")
 
     total_length = map1.print_mst(mst)
     result_display.insert(tk.END, f"Subway route total length: {total_length}km")
@@ -225,18 +253,27 @@ def operation3():
 
 def operation4():
     op_clear()
-    location = location_entry_1.get().upper()
-    if location:
-        h_loc(points_data[location])
-        total, edges = map1.bus_route(map1.v[alp[location]])
+    location = get_location(location_entry_1)
+    # the stops may be listed in the second entry, e.g. "G, P, Z"
+    stops = [stop if stop in map1.index else stop.upper()
+             for stop in location_entry_2.get().replace(',', ' ').split()]
+    if location in map1.index and all(stop in map1.index for stop in stops):
+        h_loc(points_data.get(location))
+        if stops:
+            for stop in stops:
+                h_loc(points_data.get(stop))
+            total, edges = map1.steiner_tree([map1.vertex(x) for x in [location] + stops])
+        else:
+            total, edges = service.bus_route(map1.vertex(location))
         for u, v in edges:
-            start_x, start_y = points_data[u.id]
-            end_x, end_y = points_data[v.id]
-            map_canvas.create_line(
-                start_x, start_y, end_x, end_y, fill="green", width=4, tags="path_line")
+            draw_edge(u.id, v.id, "green")
 
-        result_display.insert(
-            tk.END, f"Bus route starting from {location} \n total length: {total}km")
+        if stops:
+            result_display.insert(
+                tk.END, f"Bus network from {location} through {', '.join(stops)} \n total length: {total}km")
+        else:
+            result_display.insert(
+                tk.END, f"Bus route starting from {location} \n total length: {total}km")
     else:
         messagebox.showerror(
             "Error", "Please enter a start location for the bus route.")
@@ -0,0 +1,26 @@
+import os
+import apsp
+from p2p_bench import grid_graph
+from benchutil import timed
+
+
+if __name__ == "__main__":
+    print(f'{os.cpu_count()} cores')
+    for side in [20, 45, 70]:
+        graph = grid_graph(side)
+        csr = graph.to_csr()
+        n = len(graph.v)
+        print(f'n = {n}')
+        if n <= 2025:
+            print(f'  Graph.dijkstra_allpairs {timed(graph.dijkstra_allpairs)[1]:.3f}s')
+            graph.spt = {}
+            print(f'  floydwarshall_numpy {timed(apsp.floydwarshall, apsp.adjacency_matrix(graph))[1]:.3f}s')
+        _, time_one = timed(apsp.dijkstra_allpairs, csr, 1)
+        print(f'  parallel dijkstra, 1 worker: {time_one:.3f}s')
+        for workers in [2, 4]:
+            _, elapsed = timed(apsp.dijkstra_allpairs, csr, workers)
+            print(f'  parallel dijkstra, {workers} workers: {elapsed:.3f}s, speedup {time_one / elapsed:.2f}x')
+        _, elapsed = timed(apsp.dijkstra_allpairs, csr, 4, './project2/allpairs_bench')
+        print(f'  parallel dijkstra, 4 workers, memory-mapped: {elapsed:.3f}s')
+        os.remove('./project2/allpairs_bench_dist.npy')
+        os.remove('./project2/allpairs_bench_next.npy')
@@ -0,0 +1,238 @@
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+
+def adjacency_matrix(graph):
+    '''
+    Get the adjacency matrix of a Graph as a NumPy array, vertex i being graph.v[i].
+
+    Missing edges are infinity and the diagonal is 0, as in Graph.get_matrix.
+    '''
+    n = len(graph.v)
+    index = graph.index
+    W = np.full((n, n), np.inf)
+    for u in graph.v:
+        i = index[u.id]
+        for v, w in u.ad.items():
+            W[i, index[v.id]] = w
+    np.fill_diagonal(W, 0)
+    return W
+
+
+def floydwarshall(W):
+    '''
+    Floyd-Warshall algorithm on an adjacency matrix, each step k done on the whole matrix at once.
+
+    Parameters:
+        - W: the n x n adjacency matrix, infinity for missing edges.
+
+    Returns:
+        - D: the n x n matrix of shortest distances.
+        - nxt: the n x n next-hop matrix, nxt[i, j] being the vertex after i on a shortest path
+          from i to j, -1 if there is none.
+    '''
+    D = np.array(W, dtype=np.float64)
+    n = len(D)
+    nxt = np.where(np.isfinite(D), np.arange(n, dtype=np.int32), np.int32(-1))
+    through = np.empty_like(D)
+    better = np.empty(D.shape, dtype=bool)
+    for k in range(n):
+        # row k and column k do not change in step k, so D can be updated in place
+        np.add(D[:, k, None], D[None, k, :], out=through)
+        np.less(through, D, out=better)
+        np.minimum(D, through, out=D)
+        np.copyto(nxt, nxt[:, k, None], where=better)  # go towards k first
+    return D, nxt
+
+
+def floydwarshall_blocked(W, block=256, workers=4):
+    '''
+    Blocked Floyd-Warshall algorithm, with the blocks of each phase spread over worker processes.
+
+    The matrix is cut into block x block tiles. Phase kb first closes the diagonal tile (kb, kb),
+    then the other tiles of row kb and column kb, which only need the diagonal one, then all
+    the remaining tiles, which only need row kb and column kb. The tiles within the last two
+    steps are independent, so each of them is handed out to the workers, which update D and nxt
+    in place in shared memory.
+
+    Parameters:
+        - W: the n x n adjacency matrix, infinity for missing edges.
+        - block: the side of a tile, default is 256.
+        - workers: the number of worker processes, default is 4; with 1 everything runs here.
+
+    Returns:
+        - (D, nxt), as for floydwarshall.
+    '''
+    W = np.asarray(W, dtype=np.float64)
+    n = len(W)
+    tiles = [(lo, min(lo + block, n)) for lo in range(0, n, block)]
+    if workers <= 1:
+        D = W.copy()
+        nxt = np.where(np.isfinite(D), np.arange(n, dtype=np.int32), np.int32(-1))
+        _set_matrices(D, nxt)
+        for kt in tiles:
+            for tasks in _phase_tasks(tiles, kt):
+                for task in tasks:
+                    _relax_tiles(task)
+        _set_matrices(None, None)
+        return D, nxt
+    shm_D = shared_memory.SharedMemory(create=True, size=W.nbytes)
+    shm_nxt = shared_memory.SharedMemory(create=True, size=n * n * 4)
+    try:
+        D = np.ndarray((n, n), dtype=np.float64, buffer=shm_D.buf)
+        nxt = np.ndarray((n, n), dtype=np.int32, buffer=shm_nxt.buf)
+        D[:] = W
+        nxt[:] = np.where(np.isfinite(W), np.arange(n, dtype=np.int32), np.int32(-1))
+        with ProcessPoolExecutor(workers, initializer=_attach, initargs=(shm_D.name, shm_nxt.name, n)) as pool:
+            for kt in tiles:
+                for tasks in _phase_tasks(tiles, kt):
+                    list(pool.map(_relax_tiles, tasks))  # wait for the step before the next one
+        result = D.copy(), nxt.copy()
+        del D, nxt  # release the views before closing the shared memory
+        return result
+    finally:
+        shm_D.close()
+        shm_D.unlink()
+        shm_nxt.close()
+        shm_nxt.unlink()
+
+
+def _phase_tasks(tiles, kt):
+    '''
+    The three steps of the phase of tile kt, each a list of independent tasks.
+    A task is (rows, list of column tiles, k range), rows and k range being (lo, hi) pairs.
+    '''
+    others = [t for t in tiles if t != kt]
+    yield [(kt, [kt], kt)]
+    yield [(kt, others, kt)] + [(it, [kt], kt) for it in others] if others else []
+    yield [(it, others, kt) for it in others]
+
+
+_D = _nxt = None  # the matrices the tasks work on, in the worker processes
+_shm = []
+
+
+def _set_matrices(D, nxt):
+    global _D, _nxt
+    _D, _nxt = D, nxt
+
+
+def _attach(name_D, name_nxt, n):
+    '''Initialize a worker process: open the shared matrices.'''
+    _shm.extend([shared_memory.SharedMemory(name=name_D), shared_memory.SharedMemory(name=name_nxt)])
+    _set_matrices(np.ndarray((n, n), dtype=np.float64, buffer=_shm[0].buf),
+                  np.ndarray((n, n), dtype=np.int32, buffer=_shm[1].buf))
+
+
+def _relax_tiles(task):
+    '''Relax the tiles (rows, j) for each column tile j through every k of the k range.'''
+    (i0, i1), columns, (k0, k1) = task
+    D, nxt = _D, _nxt
+    for j0, j1 in columns:
+        Dij = D[i0:i1, j0:j1]  # views, updated in place
+        nij = nxt[i0:i1, j0:j1]
+        through = np.empty_like(Dij)
+        better = np.empty(Dij.shape, dtype=bool)
+        for k in range(k0, k1):
+            np.add(D[i0:i1, k, None], D[None, k, j0:j1], out=through)
+            np.less(through, Dij, out=better)
+            np.minimum(Dij, through, out=Dij)
+            np.copyto(nij, nxt[i0:i1, k, None], where=better)
+
+
+def dijkstra_allpairs(csr, workers=4, filename=None, chunk=64):
+    '''
+    All-pairs shortest paths by one Dijkstra per source on a CSRGraph, sources fanned out over worker processes.
+
+    Each run keeps its state in local lists, so the runs are independent. Every worker gets its own
+    copy of the CSR arrays when the pool starts, inherited if the workers fork but pickled into each
+    of them under spawn or forkserver, and sends back one row of distances and one row of next hops
+    per source.
+
+    Parameters:
+        - csr: the CSRGraph.
+        - workers: the number of worker processes, default is 4; with 1 everything runs here.
+        - filename: if given, the matrices are memory-mapped to filename_dist.npy and filename_next.npy
+          instead of being kept in memory, default is None.
+        - chunk: the number of sources per task, default is 64.
+
+    Returns:
+        - (D, nxt), as for floydwarshall.
+    '''
+    n = csr.n
+    if filename is None:
+        D = np.empty((n, n), dtype=np.float64)
+        nxt = np.empty((n, n), dtype=np.int32)
+    else:
+        D = np.lib.format.open_memmap(f'{filename}_dist.npy', mode='w+', dtype=np.float64, shape=(n, n))
+        nxt = np.lib.format.open_memmap(f'{filename}_next.npy', mode='w+', dtype=np.int32, shape=(n, n))
+    tasks = [(lo, min(lo + chunk, n)) for lo in range(0, n, chunk)]
+    if workers <= 1:
+        _set_csr(csr)
+        results = map(_sssp_rows, tasks)
+    else:
+        pool = ProcessPoolExecutor(workers, initializer=_set_csr, initargs=(csr,))
+        results = pool.map(_sssp_rows, tasks)
+    try:
+        for (lo, hi), (dist, hops) in zip(tasks, results):
+            D[lo:hi] = np.frombuffer(dist, dtype=np.float64).reshape(hi - lo, n)
+            nxt[lo:hi] = np.frombuffer(hops, dtype=np.int32).reshape(hi - lo, n)
+    finally:
+        _set_csr(None)
+        if workers > 1:
+            pool.shutdown()
+    if filename is not None:
+        D.flush()
+        nxt.flush()
+    return D, nxt
+
+
+_csr = None  # the graph the Dijkstra tasks run on
+
+
+def _set_csr(csr):
+    global _csr
+    _csr = csr
+
+
+def _sssp_rows(task):
+    '''
+    Run Dijkstra from each source in the range task.
+
+    Returns:
+        - (the rows of distances, the rows of next hops), as bytes.
+    '''
+    lo, hi = task
+    csr = _csr
+    dist = array('d')
+    hops = array('i')
+    for s in range(lo, hi):
+        d, pi = csr.dijkstra(s)
+        # the next hop of t is that of its predecessor, or t itself next to s; the predecessors
+        # are followed up to a vertex already done, since with 0 weights a vertex can be as far
+        # from s as its predecessor and come before it in distance order
+        nh = array('i', [-1]) * csr.n
+        nh[s] = s
+        for t in range(csr.n):
+            chain = []
+            while nh[t] == -1 and pi[t] != -1:
+                chain.append(t)
+                t = pi[t]
+            for x in reversed(chain):
+                nh[x] = x if pi[x] == s else nh[pi[x]]
+        dist.extend(d)
+        hops.extend(nh)
+    return dist.tobytes(), hops.tobytes()
+
+
+def path(nxt, i, j):
+    '''Rebuild the shortest path from i to j from the next-hop matrix, as a list of indices.'''
+    if nxt[i, j] == -1:
+        return []
+    result = [i]
+    while i != j:
+        i = int(nxt[i, j])
+        result.append(i)
+    return result
@@ -0,0 +1,19 @@
+import gc
+import time
+
+
+def timed(func, *args):
+    '''
+    Call func(*args) once, with the garbage collector off as timeit does.
+
+    Returns:
+        - the result of the call and the time it took in seconds.
+    '''
+    gc.collect()
+    gc.disable()  # keep collections of garbage left by earlier runs out of the timing
+    try:
+        start = time.perf_counter()
+        result = func(*args)
+        return result, time.perf_counter() - start
+    finally:
+        gc.enable()
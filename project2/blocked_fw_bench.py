@@ -0,0 +1,19 @@
+import os
+import apsp
+from p2p_bench import grid_graph
+from benchutil import timed
+
+
+if __name__ == "__main__":
+    print(f'{os.cpu_count()} cores')
+    for side in [20, 30, 45]:
+        graph = grid_graph(side)
+        W = apsp.adjacency_matrix(graph)
+        if side <= 20:  # the pure Python version is O(n^3) interpreted steps
+            print(f'n = {len(W)}: floydwarshall {timed(graph.floydwarshall)[1]:.3f}s')
+        _, time_single = timed(apsp.floydwarshall, W)
+        print(f'n = {len(W)}: floydwarshall_numpy {time_single:.3f}s')
+        for block in [128, 256]:
+            for workers in [1, 2, 4]:
+                _, elapsed = timed(apsp.floydwarshall_blocked, W, block, workers)
+                print(f'  block {block}, {workers} workers: {elapsed:.3f}s, speedup {time_single / elapsed:.2f}x')
@@ -0,0 +1,22 @@
+import math
+import time
+from csr_bench import grid_edges
+from csrgraph import CSRGraph
+
+
+if __name__ == "__main__":
+    CSRGraph.from_edges(['a', 'b'], [(0, 1, 1.0)]).mst_boruvka()  # import NumPy before timing
+    for side in [100, 300, 700, 1000]:
+        names = [f'v{i}' for i in range(side * side)]
+        edges = grid_edges(side)
+        csr = CSRGraph.from_edges(names, edges)
+        print(f'n = {len(names)}, {len(edges)} edges')
+        results = []
+        for name, func in [('kruskal', csr.mst_kruskal), ('boruvka', csr.mst_boruvka),
+                           ('prim', lambda: csr.mst_prim(0))]:
+            start = time.perf_counter()
+            mst = func()
+            elapsed = time.perf_counter() - start
+            results.append(math.fsum(w for _, _, w in mst))
+            print(f'  {name:8s} {elapsed:8.3f}s, {len(edges) / elapsed / 1e6:6.2f} M edges/s')
+        assert all(math.isclose(total, results[0]) for total in results)
@@ -0,0 +1,255 @@
+import heapq
+from array import array
+
+
+class ContractionHierarchy:
+    '''
+    A contraction hierarchy over an undirected Graph, for fast point-to-point shortest paths.
+
+    Preprocessing contracts the vertices one by one, least important first, adding a shortcut
+    between two neighbours of the contracted vertex whenever the path through it is the only
+    shortest one. A query then runs a bidirectional Dijkstra that only climbs to higher ranked
+    vertices, and the shortcuts on the path found are unpacked back into original edges.
+    As the graph is undirected, the upward edges of a vertex also serve as its downward
+    edges, both for the backward search and for stalling; directed graphs are not supported.
+
+    Vertices are handled by their index in graph.index throughout. Queries run on a flat copy
+    of the upward edges, in CSR form, and on distance lists indexed by vertex.
+    '''
+    def __init__(self, graph, rank, up, middle):
+        '''
+        Initialize a contraction hierarchy, use build or load to make one.
+
+        Parameters:
+            - graph: the Graph the hierarchy belongs to.
+            - rank: list of the contraction order of each vertex.
+            - up: list of the (vertex, weight) edges from each vertex to higher ranked vertices.
+            - middle: dictionary from a shortcut (u, v), u < v, to the vertex it bypasses.
+        '''
+        self.graph = graph
+        self.rank = rank
+        self.up = up
+        self.middle = middle
+        self.settled = 0  # vertices settled by the last query
+        # the upward edges of vertex u are up_targets[j], up_weights[j] for j in up_offsets[u]..up_offsets[u+1]-1
+        self.up_offsets = array('q', [0])
+        self.up_targets = array('i')
+        self.up_weights = array('d')
+        for edges in up:
+            self.up_targets.extend(v for v, _ in edges)
+            self.up_weights.extend(w for _, w in edges)
+            self.up_offsets.append(len(self.up_targets))
+
+    @classmethod
+    def build(cls, graph, witness_limit=50):
+        '''
+        Contract the vertices of graph, the least important first.
+
+        The importance of a vertex is twice the shortcuts its contraction needs, minus its degree,
+        plus its contracted neighbours and its level in the hierarchy, which keeps contraction spread
+        out over the graph. It is recomputed lazily when the vertex comes to the top of the queue.
+
+        Parameters:
+            - graph: the Graph to preprocess.
+            - witness_limit: the most vertices a witness search may settle, default is 50.
+              A search cut short only adds a shortcut that was not strictly needed.
+        '''
+        if graph.directed:
+            raise ValueError('A contraction hierarchy needs an undirected graph.')
+        index = graph.index
+        n = len(graph.v)
+        adj = [{} for _ in range(n)]  # the remaining graph, shortcuts included
+        for u in graph.v:
+            iu = index[u.id]
+            for v, w in u.ad.items():
+                iv = index[v.id]
+                if iv != iu and w < adj[iu].get(iv, float('inf')):
+                    adj[iu][iv] = w
+                    adj[iv][iu] = w
+        middle = {}
+        rank = [0] * n
+        up = [None] * n
+        deleted = [0] * n  # contracted neighbours of each vertex
+        level = [0] * n  # one more than the highest level of the contracted neighbours
+        pq = [(2 * len(cls._shortcuts(adj, u, witness_limit)) - len(adj[u]), u) for u in range(n)]
+        heapq.heapify(pq)
+        order = 0
+        while pq:
+            _, u = heapq.heappop(pq)
+            shortcuts = cls._shortcuts(adj, u, witness_limit)
+            priority = 2 * len(shortcuts) - len(adj[u]) + deleted[u] + level[u]
+            if pq and priority > pq[0][0]:  # lazy update: u is no longer the least important
+                heapq.heappush(pq, (priority, u))
+                continue
+            for a, b, w in shortcuts:
+                if w < adj[a].get(b, float('inf')):
+                    adj[a][b] = w
+                    adj[b][a] = w
+                    middle[(a, b) if a < b else (b, a)] = u
+            rank[u] = order
+            order += 1
+            up[u] = list(adj[u].items())  # every remaining neighbour is contracted later
+            for v in adj[u]:
+                del adj[v][u]
+                deleted[v] += 1
+                level[v] = max(level[v], level[u] + 1)
+            adj[u] = {}
+        return cls(graph, rank, up, middle)
+
+    @staticmethod
+    def _witness(adj, s, skip, targets, limit, bound):
+        '''
+        Dijkstra from s in the remaining graph without vertex skip, settling at most limit
+        vertices and none further than bound, and stopping once all of targets are settled.
+
+        Returns:
+            - a dictionary of the (upper bounds on the) distances found.
+        '''
+        dist = {s: 0}
+        pq = [(0, s)]
+        settled = 0
+        left = len(targets)
+        while pq and settled < limit:
+            d, u = heapq.heappop(pq)
+            if d > dist[u]:
+                continue
+            if d > bound:
+                break
+            settled += 1
+            if u in targets:
+                left -= 1
+                if left == 0:
+                    break
+            for v, w in adj[u].items():
+                if v != skip and d + w < dist.get(v, float('inf')):
+                    dist[v] = d + w
+                    heapq.heappush(pq, (d + w, v))
+        return dist
+
+    @classmethod
+    def _shortcuts(cls, adj, u, limit):
+        '''Find the shortcuts (a, b, weight) needed to contract u.'''
+        neighbours = list(adj[u].items())
+        if len(neighbours) < 2:
+            return []
+        shortcuts = []
+        for i, (a, wa) in enumerate(neighbours[:-1]):
+            rest = neighbours[i + 1:]
+            targets = {b for b, _ in rest}
+            dist = cls._witness(adj, a, u, targets, limit, wa + max(wb for _, wb in rest))
+            for b, wb in rest:
+                if dist.get(b, float('inf')) > wa + wb:  # no witness path, the shortcut is needed
+                    shortcuts.append((a, b, wa + wb))
+        return shortcuts
+
+    def query(self, s, t):
+        '''
+        Find the shortest path from vertex s to vertex t.
+
+        Returns:
+            - (the length of the path, the path as a list of vertices), or (infinity, []) if there is none.
+        '''
+        index = self.graph.index
+        offsets, targets, weights = self.up_offsets, self.up_targets, self.up_weights
+        n = len(self.rank)
+        inf = float('inf')
+        si, ti = index[s.id], index[t.id]
+        dist = ([inf] * n, [inf] * n)
+        dist[0][si] = dist[1][ti] = 0
+        pred = ([-1] * n, [-1] * n)
+        pqs = ([(0, si)], [(0, ti)])
+        best, meet = inf, -1
+        settled = 0
+        while pqs[0] or pqs[1]:
+            # take the side with the smaller key, a side is done once its key reaches best
+            side = 0 if pqs[0] and (not pqs[1] or pqs[0][0][0] <= pqs[1][0][0]) else 1
+            pq = pqs[side]
+            d, u = heapq.heappop(pq)
+            if d >= best:
+                pq.clear()
+                continue
+            dside = dist[side]
+            if d > dside[u]:
+                continue
+            settled += 1
+            through = d + dist[1 - side][u]
+            if through < best:
+                best, meet = through, u
+            edges = range(offsets[u], offsets[u + 1])
+            # stall on demand: a higher vertex already reached gives u a shorter distance
+            for j in edges:
+                if dside[targets[j]] + weights[j] < d:
+                    break
+            else:
+                pside = pred[side]
+                for j in edges:
+                    v = targets[j]
+                    if d + weights[j] < dside[v]:
+                        dside[v] = d + weights[j]
+                        pside[v] = u
+                        heapq.heappush(pq, (d + weights[j], v))
+        self.settled = settled
+        if meet == -1:
+            return float('inf'), []
+        hops = []
+        u = meet
+        while u != -1:  # the upward path from s
+            hops.append(u)
+            u = pred[0][u]
+        hops.reverse()
+        u = pred[1][meet]
+        while u != -1:  # the downward path to t
+            hops.append(u)
+            u = pred[1][u]
+        return best, [self.graph.v[i] for i in self._unpack(hops)]
+
+    def _unpack(self, hops):
+        '''Replace the shortcuts between consecutive vertices of hops by the vertices they bypass.'''
+        path = [hops[0]]
+        stack = [(hops[i], hops[i + 1]) for i in range(len(hops) - 2, -1, -1)]
+        while stack:
+            a, b = stack.pop()
+            m = self.middle.get((a, b) if a < b else (b, a))
+            if m is None:  # an original edge
+                path.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+        return path
+
+    def save(self, filename):
+        '''
+        Write the hierarchy to a text file: the vertex ids in index order with their ranks,
+        then the upward edges as "u v weight middle", middle being "-" for original edges.
+        '''
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f'# {len(self.rank)} {sum(len(e) for e in self.up)}\n')
+            for u, r in zip(self.graph.index, self.rank):
+                f.write(f'{u} {r}\n')
+            names = self.graph.index.names
+            for u, edges in enumerate(self.up):
+                for v, w in edges:
+                    m = self.middle.get((u, v) if u < v else (v, u))
+                    f.write(f'{names[u]} {names[v]} {w!r} {"-" if m is None else names[m]}\n')
+
+    @classmethod
+    def load(cls, graph, filename):
+        '''Read a hierarchy of graph written by save.'''
+        index = graph.index
+        with open(filename, 'r', encoding='utf-8') as f:
+            n, m = map(int, f.readline().split()[1:])
+            if n != len(graph.v):
+                raise ValueError('The hierarchy does not match the graph.')
+            rank = [0] * n
+            for _ in range(n):
+                u, r = f.readline().split()
+                rank[index[u]] = int(r)
+            up = [[] for _ in range(n)]
+            middle = {}
+            for _ in range(m):
+                u, v, w, mid = f.readline().split()
+                u, v = index[u], index[v]
+                up[u].append((v, float(w)))
+                if mid != '-':
+                    middle[(u, v) if u < v else (v, u)] = index[mid]
+        return cls(graph, rank, up, middle)
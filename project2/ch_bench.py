@@ -0,0 +1,34 @@
+import os
+import random
+import time
+from ch import ContractionHierarchy
+from p2p_bench import grid_graph
+
+
+if __name__ == "__main__":
+    for side in [30, 60, 100]:
+        graph = grid_graph(side)
+        random.seed(1)
+        queries = [tuple(random.sample(graph.v, 2)) for _ in range(200)]
+        print(f'n = {len(graph.v)}, {len(queries)} random queries')
+        start = time.perf_counter()
+        ch = ContractionHierarchy.build(graph)
+        time_build = time.perf_counter() - start
+        ch.save('./project2/ch_bench.txt')
+        start = time.perf_counter()
+        ch = ContractionHierarchy.load(graph, './project2/ch_bench.txt')
+        time_load = time.perf_counter() - start
+        print(f'  preprocessing {time_build:.2f}s ({len(ch.middle)} shortcuts), load {time_load:.3f}s')
+        for name, search in [('dijkstra', lambda s, t: graph.dijkstra(s)),
+                             ('bidijkstra', graph.bidijkstra),
+                             ('astar', graph.astar),
+                             ('ch', ch.query)]:
+            settled = 0
+            start = time.perf_counter()
+            for s, t in queries:
+                search(s, t)
+                settled += ch.settled if name == 'ch' else graph.settled
+            elapsed = time.perf_counter() - start
+            print(f'  {name:10s} {settled / len(queries):9.1f} settled, {elapsed / len(queries) * 1000:8.3f} ms/query')
+            graph.spt = {}
+    os.remove('./project2/ch_bench.txt')
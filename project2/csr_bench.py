@@ -0,0 +1,56 @@
+import random
+import time
+import tracemalloc
+from mainpj2 import Graph, Vertex
+from csrgraph import CSRGraph
+
+
+def grid_edges(side):
+    '''Edges of a side x side grid road network with random lengths, as (u, v, weight) ids.'''
+    random.seed(0)
+    edges = []
+    for r in range(side):
+        for c in range(side):
+            u = r * side + c
+            if c + 1 < side:
+                edges.append((u, u + 1, round(random.uniform(1, 10), 2)))
+            if r + 1 < side:
+                edges.append((u, u + side, round(random.uniform(1, 10), 2)))
+    return edges
+
+
+def build_graph(names, edges):
+    vertices = [Vertex(name) for name in names]
+    for u, v, w in edges:
+        vertices[u].add_neighbour(vertices[v], w)
+        vertices[v].add_neighbour(vertices[u], w)
+    return Graph(vertices)
+
+
+def traced(func, *args):
+    '''Run func and return its result with the memory it leaves allocated.'''
+    tracemalloc.start()
+    result = func(*args)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, memory
+
+
+if __name__ == "__main__":
+    for side in [30, 100, 300]:
+        names = [f'v{i}' for i in range(side * side)]
+        edges = grid_edges(side)
+        graph, mem_graph = traced(build_graph, names, edges)
+        csr, mem_csr = traced(CSRGraph.from_edges, names, edges)
+        print(f'n = {len(names)}, {len(edges)} edges')
+        print(f'  memory per edge: Graph {mem_graph / len(edges):7.1f} B, '
+              f'CSR {mem_csr / len(edges):6.1f} B (arrays alone {csr.memory() / len(edges):4.1f} B)')
+        for name, func, csr_func in [('dijkstra', lambda: graph.dijkstra(graph.v[0]), lambda: csr.dijkstra(0)),
+                                     ('kruskal', graph.mst_kruskal, csr.mst_kruskal),
+                                     ('prim', lambda: graph.mst_prim(graph.v[0]), lambda: csr.mst_prim(0))]:
+            start = time.perf_counter()
+            func()
+            print(f'  Graph {name} {time.perf_counter() - start:.4f}s', end='')
+            start = time.perf_counter()
+            csr_func()
+            print(f', CSR {name} {time.perf_counter() - start:.4f}s')
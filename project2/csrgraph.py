@@ -0,0 +1,309 @@
+import heapq
+from array import array
+from registry import VertexRegistry
+
+
+class CSRGraph:
+    '''
+    A graph in compressed sparse row (CSR) form, with vertices numbered 0..n-1.
+
+    The arcs leaving vertex u are stored at positions offsets[u] to offsets[u+1]-1 of the
+    flat arrays targets (the head of each arc) and weights (its length). An undirected edge
+    is stored as two arcs. names maps vertex ids to vertex names and the registry index maps
+    them back.
+    '''
+    def __init__(self, names, offsets, targets, weights):
+        '''
+        Initialize a CSR graph.
+
+        Parameters:
+            - names: list of vertex names, names[i] is the name of vertex i, or a VertexRegistry.
+            - offsets: array of n+1 arc offsets.
+            - targets: array of arc heads, as vertex ids.
+            - weights: array of arc weights.
+        '''
+        self.index = names if isinstance(names, VertexRegistry) else VertexRegistry(names)
+        self.names = self.index.names
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.source = None  # the graph file the arrays are mapped from, see graphfile
+
+    def __reduce__(self):
+        '''Pickle a mapped graph as its file name, so that other processes map the same file.'''
+        if self.source is not None:
+            from graphfile import open_csr
+            return open_csr, (self.source,)
+        return CSRGraph, (list(self.names), self.offsets, self.targets, self.weights)
+
+    @property
+    def n(self):
+        '''Number of vertices.'''
+        return len(self.offsets) - 1
+
+    @property
+    def m(self):
+        '''Number of arcs, i.e. twice the number of undirected edges.'''
+        return len(self.targets)
+
+    @classmethod
+    def from_edges(cls, names, edges, directed=False):
+        '''
+        Build a CSR graph from a list of edges.
+
+        Parameters:
+            - names: list of vertex names.
+            - edges: list of (u, v, weight) tuples, u and v being vertex ids.
+            - directed: whether the edges are one-way, default is False.
+        '''
+        n = len(names)
+        degree = [0] * (n + 1)
+        for u, v, _ in edges:  # count the arcs leaving each vertex
+            degree[u + 1] += 1
+            if not directed:
+                degree[v + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+        offsets = array('q', degree)
+        m = degree[n]
+        targets = array('i', bytes(4 * m))
+        weights = array('d', bytes(8 * m))
+        pos = degree[:n]  # next free position of each vertex
+        for u, v, w in edges:  # fill the arcs in
+            targets[pos[u]] = v
+            weights[pos[u]] = w
+            pos[u] += 1
+            if not directed:
+                targets[pos[v]] = u
+                weights[pos[v]] = w
+                pos[v] += 1
+        return cls(names, offsets, targets, weights)
+
+    @classmethod
+    def from_graph(cls, graph):
+        '''
+        Build a CSR graph from a Graph, vertex i being graph.v[i].
+        '''
+        index = graph.index
+        edges = [(index[u.id], index[v.id], w) for u, v, w in graph.get_edges()]
+        return cls.from_edges(index, edges, directed=True)  # get_edges lists both arcs already
+
+    def neighbours(self, u):
+        '''Iterate over the (vertex, weight) pairs of the arcs leaving u.'''
+        start, end = self.offsets[u], self.offsets[u + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def weight(self, u, v):
+        '''Return the weight of the arc (u, v), infinity if there is none.'''
+        for x, w in self.neighbours(u):
+            if x == v:
+                return w
+        return float('inf')
+
+    def memory(self):
+        '''Return the number of bytes taken by the offsets, targets and weights arrays.'''
+        return sum(a.itemsize * len(a) for a in (self.offsets, self.targets, self.weights))
+
+    def dijkstra(self, s):
+        '''
+        Dijkstra's algorithm for finding the single-source shortest path.
+
+        Returns:
+            - d: list of distances from s, infinity for unreachable vertices.
+            - pi: array of predecessors on a shortest path, -1 for s and unreachable vertices.
+        '''
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        d = [float('inf')] * self.n
+        pi = array('i', [-1]) * self.n
+        d[s] = 0
+        pq = [(0, s)]
+        while pq:
+            cur_d, u = heapq.heappop(pq)
+            if cur_d > d[u]:  # if the distance is not updated, skip
+                continue
+            for j in range(offsets[u], offsets[u + 1]):
+                v = targets[j]
+                nd = cur_d + weights[j]
+                if nd < d[v]:  # relax the arc (u, v)
+                    d[v] = nd
+                    pi[v] = u
+                    heapq.heappush(pq, (nd, v))
+        return d, pi
+
+    def path(self, pi, s, v):
+        '''Rebuild the path from s to v as a list of vertex ids, empty if there is none.'''
+        path = []
+        while v != -1:
+            path.append(v)
+            if v == s:
+                return path[::-1]
+            v = pi[v]
+        return []
+
+    def _edge_arrays(self):
+        '''
+        Get each undirected edge once as NumPy arrays (lo, hi, weight), lo < hi, ordered by weight.
+
+        Of parallel edges only the lightest is kept, and self-loops are dropped. Edges of equal
+        weight are ordered by (lo, hi), so the order is the same whatever order the arcs are in.
+        '''
+        import numpy as np
+        heads = np.asarray(self.targets, dtype=np.int64)
+        tails = np.repeat(np.arange(self.n, dtype=np.int64), np.diff(np.asarray(self.offsets, dtype=np.int64)))
+        weights = np.asarray(self.weights, dtype=np.float64)
+        edge = np.minimum(tails, heads) * self.n + np.maximum(tails, heads)  # one key per edge
+        # sort by edge, lightest first, keep the first arc of each edge and drop self-loops
+        order = np.lexsort((weights, edge))
+        edge, weights = edge[order], weights[order]
+        keep = edge // self.n != edge % self.n
+        keep[1:] &= edge[1:] != edge[:-1]
+        edge, weights = edge[keep], weights[keep]
+        order = np.argsort(weights, kind='stable')
+        edge, weights = edge[order], weights[order]
+        return edge // self.n, edge % self.n, weights
+
+    def _edge_lists(self):
+        '''The same edges as _edge_arrays, in the same order, as lists sorted without NumPy.'''
+        best = {}
+        for u in range(self.n):
+            for j in range(self.offsets[u], self.offsets[u + 1]):
+                v, w = self.targets[j], self.weights[j]
+                if u != v:
+                    edge = (u, v) if u < v else (v, u)
+                    if w < best.get(edge, float('inf')):
+                        best[edge] = w
+        edges = sorted((w, u, v) for (u, v), w in best.items())
+        return [u for _, u, _ in edges], [v for _, _, v in edges], [w for w, _, _ in edges]
+
+    def mst_kruskal(self):
+        '''
+        Kruskal's algorithm for finding the minimum spanning tree of a graph, on flat arrays.
+
+        The edges come from _edge_arrays, or from _edge_lists if NumPy is missing, which is
+        several times slower. The union-find is two plain lists with path halving and union
+        by rank, so nothing recurses, and the scan stops at n-1 edges.
+
+        Returns:
+            - mst: list of (u, v, weight) edges of the minimum spanning tree, u < v, by weight.
+        '''
+        n = self.n
+        try:
+            lo, hi, weights = (a.tolist() for a in self._edge_arrays())
+        except ImportError:
+            lo, hi, weights = self._edge_lists()
+        parent = list(range(n))
+        rank = [0] * n
+        mst = []
+        for u, v, w in zip(lo, hi, weights):
+            ru, rv = u, v
+            while parent[ru] != ru:  # path halving
+                parent[ru] = parent[parent[ru]]
+                ru = parent[ru]
+            while parent[rv] != rv:
+                parent[rv] = parent[parent[rv]]
+                rv = parent[rv]
+            if ru != rv:  # if the two vertices are in different sets
+                mst.append((u, v, w))
+                if len(mst) == n - 1:
+                    break
+                if rank[ru] > rank[rv]:  # union by rank
+                    parent[rv] = ru
+                else:
+                    parent[ru] = rv
+                    if rank[ru] == rank[rv]:
+                        rank[rv] += 1
+        return mst
+
+    def mst_boruvka(self):
+        '''
+        Boruvka's algorithm for finding the minimum spanning tree of a graph, a round at a time on whole arrays.
+
+        Each round, every component picks the lightest edge leaving it, all at once with
+        np.minimum.at, and the components joined by the picked edges are merged by pointer
+        jumping. The components at least halve every round, so there are at most log2(n) rounds,
+        and the edges inside a component are dropped as they go. Ties are broken by the order of
+        _edge_arrays, which keeps the picked edges free of cycles and makes the tree the same as
+        that of mst_kruskal.
+
+        Returns:
+            - mst: list of (u, v, weight) edges of the minimum spanning tree, u < v, by weight.
+        '''
+        import numpy as np
+        n = self.n
+        edges = self._edge_arrays()
+        lo, hi, _ = edges
+        eid = np.arange(len(lo))  # the position of each edge in the weight order
+        comp = np.arange(n)  # the representative vertex of the component of each vertex
+        vertices = np.arange(n)
+        picked = np.zeros(len(lo), dtype=bool)
+        while True:
+            cu, cv = comp[lo], comp[hi]
+            live = cu != cv  # the edges between two components
+            if not live.any():
+                break
+            lo, hi, eid, cu, cv = lo[live], hi[live], eid[live], cu[live], cv[live]
+            m = len(lo)
+            best = np.full(n, m)  # the lightest edge leaving each component, m for none
+            np.minimum.at(best, cu, np.arange(m))
+            np.minimum.at(best, cv, np.arange(m))
+            c = np.nonzero(best < m)[0]
+            e = best[c]
+            picked[eid[e]] = True
+            # hook each component onto the other end of its edge; two components that picked
+            # the same edge point at each other, and the smaller one becomes the root
+            parent = vertices.copy()
+            parent[c] = np.where(cu[e] == c, cv[e], cu[e])
+            mutual = (parent[parent] == vertices) & (vertices < parent)
+            parent[mutual] = vertices[mutual]
+            while True:  # pointer jumping up to the roots
+                grand = parent[parent]
+                if np.array_equal(grand, parent):
+                    break
+                parent = grand
+            comp = parent[comp]
+        lo, hi, weights = edges
+        chosen = np.nonzero(picked)[0]
+        return list(zip(lo[chosen].tolist(), hi[chosen].tolist(), weights[chosen].tolist()))
+
+    def mst_prim(self, r):
+        '''
+        Prim's algorithm for finding the minimum spanning tree of a graph.
+
+        Returns:
+            - mst: list of (pi, u, weight) edges of the minimum spanning tree grown from r.
+        '''
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        key = [float('inf')] * self.n
+        pi = array('i', [-1]) * self.n
+        intree = bytearray(self.n)
+        key[r] = 0
+        pq = [(0, r)]
+        while pq:
+            _, u = heapq.heappop(pq)
+            if intree[u]:
+                continue
+            intree[u] = 1
+            for j in range(offsets[u], offsets[u + 1]):
+                v = targets[j]
+                if not intree[v] and weights[j] < key[v]:
+                    key[v] = weights[j]
+                    pi[v] = u
+                    heapq.heappush(pq, (key[v], v))
+        return [(pi[u], u, key[u]) for u in range(self.n) if pi[u] != -1]
+
+    def bus_route(self, r):
+        '''
+        Find the bus route from the root r: the union of a shortest path to every vertex.
+
+        Returns:
+            - (total length as a string, set of (u, v) edges with u < v).
+        '''
+        _, pi = self.dijkstra(r)
+        edges = set()
+        total = 0
+        for v in range(self.n):
+            u = pi[v]
+            if u != -1:  # every tree arc lies on the path to its head
+                edges.add((u, v) if u < v else (v, u))
+                total += self.weight(u, v)
+        return f'{total:.2f}', edges
@@ -0,0 +1,107 @@
+class DaryHeap:
+    '''
+    An indexed d-ary min-heap of the items 0..n-1 (vertex indices), with decrease-key.
+
+    This is the d-ary max-heap of lab4 turned into a min-heap that also remembers where each
+    item sits, so that a key can be lowered in place instead of pushing a duplicate entry.
+    The children of position i are at d*i+1 .. d*i+d and its parent is at (i-1)//d.
+    '''
+    __slots__ = ('d', 'heap', 'keys', 'pos')
+
+    def __init__(self, n, d=4):
+        '''
+        Initialize an empty heap.
+
+        Parameters:
+            - n: the number of items, items being 0..n-1.
+            - d: the number of children of each node, default is 4.
+        '''
+        self.d = d
+        self.heap = []  # the items in heap order
+        self.keys = [float('inf')] * n  # the key of each item
+        self.pos = [-1] * n  # the position of each item in heap, -1 if it is not in the heap
+
+    def __len__(self):
+        return len(self.heap)
+
+    def __contains__(self, item):
+        return self.pos[item] != -1
+
+    def push(self, item, key):
+        '''Insert item, which must not be in the heap, with the given key.'''
+        self.keys[item] = key
+        self.heap.append(item)
+        self._sift_up(len(self.heap) - 1)
+
+    def decrease_key(self, item, key):
+        '''Lower the key of item, which must be in the heap.'''
+        if key > self.keys[item]:
+            raise ValueError("New key is larger than the current key!")
+        self.keys[item] = key
+        self._sift_up(self.pos[item])
+
+    def push_or_decrease(self, item, key):
+        '''Insert item with the given key, or lower its key if it is in the heap already.'''
+        if self.pos[item] == -1:
+            self.push(item, key)
+        else:
+            self.decrease_key(item, key)
+
+    def pop(self):
+        '''
+        Remove the item with the smallest key.
+
+        Returns:
+            - (item, key).
+        '''
+        heap = self.heap
+        if not heap:
+            raise IndexError("heap underflow")
+        top = heap[0]
+        last = heap.pop()
+        self.pos[top] = -1
+        if heap:
+            heap[0] = last
+            self._sift_down(0)
+        return top, self.keys[top]
+
+    def _sift_up(self, i):
+        '''Move the item at position i up until its parent's key is not larger.'''
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        item = heap[i]
+        key = keys[item]
+        while i > 0:
+            p = (i - 1) // d
+            parent = heap[p]
+            if keys[parent] <= key:
+                break
+            heap[i] = parent
+            pos[parent] = i
+            i = p
+        heap[i] = item
+        pos[item] = i
+
+    def _sift_down(self, i):
+        '''Move the item at position i down until no child has a smaller key.'''
+        heap, keys, pos, d = self.heap, self.keys, self.pos, self.d
+        n = len(heap)
+        item = heap[i]
+        key = keys[item]
+        while True:
+            first = d * i + 1
+            if first >= n:
+                break
+            # find the child with the smallest key
+            smallest = first
+            smallest_key = keys[heap[first]]
+            for j in range(first + 1, min(first + d, n)):
+                k = keys[heap[j]]
+                if k < smallest_key:
+                    smallest, smallest_key = j, k
+            if smallest_key >= key:
+                break
+            heap[i] = heap[smallest]
+            pos[heap[i]] = i
+            i = smallest
+        heap[i] = item
+        pos[item] = i
@@ -0,0 +1,96 @@
+import heapq
+import random
+from dheap import DaryHeap
+from p2p_bench import grid_graph
+from benchutil import timed
+
+
+def dijkstra_lazy(graph, s):
+    '''The previous Graph.dijkstra: every vertex pushed up front, duplicates skipped when popped.'''
+    graph._inti_singlesource(s)
+    pq = []
+    for v in graph.v:
+        heapq.heappush(pq, (v.d, v))
+    pushes, pops, peak = len(pq), 0, len(pq)
+    while pq:
+        cur_d, u = heapq.heappop(pq)
+        pops += 1
+        if cur_d > u.d:
+            continue
+        for v in u.ad:
+            old_d = v.d
+            graph._relax(u, v)
+            if v.d < old_d:
+                heapq.heappush(pq, (v.d, v))
+                pushes += 1
+                peak = max(peak, len(pq))
+    return pushes, pops, peak
+
+
+def prim_lazy(graph, r):
+    '''The previous Graph.mst_prim, with its in_pq set and duplicate heap entries.'''
+    for u in graph.v:
+        u.set_distance(float('inf'))
+        u.set_predecessor(None)
+    r.set_distance(0)
+    pq = []
+    in_pq = set()
+    for v in graph.v:
+        heapq.heappush(pq, (v.d, v))
+        in_pq.add(v.id)
+    while pq:
+        _, u = heapq.heappop(pq)
+        if u.id in in_pq:
+            in_pq.remove(u.id)
+        else:
+            continue
+        for v in u.ad:
+            if v.id in in_pq and u.ad[v] < v.d:
+                v.set_distance(u.ad[v])
+                v.set_predecessor(u)
+                heapq.heappush(pq, (v.d, v))
+
+
+class CountingHeap(DaryHeap):
+    '''A DaryHeap that counts its operations and its largest size.'''
+    __slots__ = ('counts',)
+
+    def __init__(self, n, d=4):
+        super().__init__(n, d)
+        self.counts = {'push': 0, 'decrease': 0, 'pop': 0, 'peak': 0}
+
+    def push(self, item, key):
+        self.counts['push'] += 1
+        super().push(item, key)
+        self.counts['peak'] = max(self.counts['peak'], len(self.heap))
+
+    def decrease_key(self, item, key):
+        self.counts['decrease'] += 1
+        super().decrease_key(item, key)
+
+    def pop(self):
+        self.counts['pop'] += 1
+        return super().pop()
+
+
+if __name__ == "__main__":
+    for side in [100, 300]:
+        graph = grid_graph(side)
+        random.seed(1)
+        sources = random.sample(graph.v, 5)
+        print(f'n = {len(graph.v)}, {len(graph.get_edges()) // 2} edges, {len(sources)} sources')
+        pushes, pops, peak = dijkstra_lazy(graph, sources[0])
+        print(f'  heapq lazy deletion: {pushes} pushes, {pops} pops, peak size {peak}')
+        heaps = []
+        graph.dijkstra(sources[0], heap=lambda n, d: heaps.append(CountingHeap(n, d)) or heaps[-1])
+        counts = heaps[0].counts
+        print(f'  indexed heap: {counts["push"]} pushes, {counts["decrease"]} decrease-keys, '
+              f'{counts["pop"]} pops, peak size {counts["peak"]}')
+        time_lazy = sum(timed(dijkstra_lazy, graph, s)[1] for s in sources) / len(sources)
+        _, time_prim_lazy = timed(prim_lazy, graph, sources[0])
+        print(f'  heapq lazy:  dijkstra {time_lazy:.3f}s, prim {time_prim_lazy:.3f}s')
+        for arity in [2, 4, 8]:
+            time_d = sum(timed(graph.dijkstra, s, arity)[1] for s in sources) / len(sources)
+            _, time_prim = timed(graph.mst_prim, sources[0], arity)
+            print(f'  {arity}-ary heap: dijkstra {time_d:.3f}s, prim {time_prim:.3f}s')
+            graph.spt = {}
@@ -0,0 +1,41 @@
+import random
+import time
+from p2p_bench import grid_graph
+from spservice import ShortestPathService
+
+
+def random_changes(graph, k):
+    '''k random road changes: a road closed, reopened, slowed down or sped up.'''
+    changes = []
+    for _ in range(k):
+        u = random.choice(graph.v)
+        v = random.choice(list(u.ad))
+        r = random.random()
+        if r < 0.2:
+            changes.append((graph.remove_edge, u, v))
+        else:
+            changes.append((graph.update_weight, u, v, round(u.ad[v] * random.uniform(0.5, 2), 3)))
+    return changes
+
+
+if __name__ == "__main__":
+    graph = grid_graph(100)
+    service = ShortestPathService(graph)
+    random.seed(2)
+    sources = random.sample(graph.v, 8)
+    print(f'n = {len(graph.v)}, {len(sources)} cached trees')
+    for k in [1, 5, 20, 100]:
+        repair = recompute = 0
+        for _ in range(5):
+            for s in sources:
+                service.path_count(s, s)
+            changes = random_changes(graph, k)
+            start = time.perf_counter()
+            for change, *args in changes:
+                change(*args)  # each change repairs every cached tree
+            repair += time.perf_counter() - start
+            start = time.perf_counter()
+            for s in sources:
+                graph.dijkstra(s)
+            recompute += time.perf_counter() - start
+        print(f'  batch of {k:3d}: repair {repair / 5 * 1000:8.1f} ms, recompute {recompute / 5 * 1000:8.1f} ms')
@@ -0,0 +1,21 @@
+import time
+from p2p_bench import grid_graph
+from benchutil import timed
+
+
+if __name__ == "__main__":
+    grid_graph(2).floydwarshall_numpy()  # warm-up, so that importing NumPy is not timed
+    for side in [10, 15, 20, 30, 45]:
+        graph = grid_graph(side)
+        n = len(graph.v)
+        _, time_numpy = timed(graph.floydwarshall_numpy)
+        if n <= 400:  # the pure Python version is O(n^3) interpreted steps
+            _, time_python = timed(graph.floydwarshall)
+            print(f'n = {n:4d}: floydwarshall {time_python:8.3f}s, floydwarshall_numpy {time_numpy:7.3f}s, '
+                  f'speedup {time_python / time_numpy:5.1f}x')
+        else:
+            print(f'n = {n:4d}: floydwarshall_numpy {time_numpy:7.3f}s')
+        start = time.perf_counter()
+        for t in graph.v[:100]:
+            graph.get_fw_path(graph.v[0], t)
+        print(f'  100 paths rebuilt from the next-hop matrix in {time.perf_counter() - start:.4f}s')
@@ -0,0 +1,171 @@
+import math
+import mmap
+import struct
+import numpy as np
+from csrgraph import CSRGraph
+from registry import VertexRegistry
+
+# The binary graph format, all numbers little-endian, every section starting at a multiple of 8:
+#
+#   header        MAGIC, version, flags (1: directed, 2: has coordinates), n, m, bytes of names
+#   name offsets  int64[n+1], name i being names[name_offsets[i]:name_offsets[i+1]]
+#   names         the UTF-8 vertex names one after another
+#   offsets       int64[n+1]  \
+#   targets       int32[m]     > the CSRGraph arrays
+#   weights       float64[m]  /
+#   coordinates   float64[n, 2], NaN for vertices without one, only if flags has 2
+MAGIC = b'PJ2GRAPH'
+VERSION = 1
+HEADER = struct.Struct('<8sIIQQQ')
+DIRECTED, COORDS = 1, 2
+
+
+def _padding(size):
+    return -size % 8
+
+
+def save_graph(filename, csr, directed=False, coords=None):
+    '''
+    Write a CSRGraph in the binary graph format.
+
+    Parameters:
+        - filename: the file to write.
+        - csr: the CSRGraph.
+        - directed: whether the arcs are one-way edges, default is False.
+        - coords: a dictionary from vertex name to (x, y), default is None (no coordinates).
+    '''
+    names = [name.encode('utf-8') for name in csr.names]
+    name_offsets = np.zeros(csr.n + 1, dtype='<i8')
+    np.cumsum([len(name) for name in names], out=name_offsets[1:])
+    blob = b''.join(names)
+    flags = (DIRECTED if directed else 0) | (COORDS if coords is not None else 0)
+    sections = [name_offsets.tobytes(), blob,
+                np.asarray(csr.offsets, dtype='<i8').tobytes(),
+                np.asarray(csr.targets, dtype='<i4').tobytes(),
+                np.asarray(csr.weights, dtype='<f8').tobytes()]
+    if coords is not None:
+        xy = np.full((csr.n, 2), np.nan, dtype='<f8')
+        for i, name in enumerate(csr.names):
+            if name in coords:
+                xy[i] = coords[name]
+        sections.append(xy.tobytes())
+    with open(filename, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, flags, csr.n, csr.m, len(blob)))
+        f.write(bytes(_padding(HEADER.size)))
+        for section in sections:
+            f.write(section)
+            f.write(bytes(_padding(len(section))))
+
+
+class GraphFile:
+    '''
+    A graph file opened read-only through mmap.
+
+    Every array is a NumPy view of the mapped file, so opening costs nothing whatever the size
+    of the graph, the operating system reads the pages in as they are used, and processes
+    that open the same file share those pages.
+    '''
+    def __init__(self, filename):
+        '''
+        Open a graph file written by save_graph.
+
+        Attributes:
+            - version, directed, n, m: from the header.
+            - name_offsets, names_blob: the names table.
+            - offsets, targets, weights: the CSR arrays.
+            - coords: the n x 2 coordinates, None if the file has none.
+        '''
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.version, flags, n, m, names_size = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC:
+            raise ValueError('{} is not a graph file.'.format(filename))
+        if self.version > VERSION:
+            raise ValueError('{} has version {}, only up to {} can be read.'.format(filename, self.version, VERSION))
+        self.directed = bool(flags & DIRECTED)
+        self.n, self.m = n, m
+        self._pos = HEADER.size + _padding(HEADER.size)
+        self.name_offsets = self._section('<i8', n + 1)
+        self.names_blob = self._section('u1', names_size)
+        self.offsets = self._section('<i8', n + 1)
+        self.targets = self._section('<i4', m)
+        self.weights = self._section('<f8', m)
+        self.coords = self._section('<f8', 2 * n).reshape(n, 2) if flags & COORDS else None
+
+    def _section(self, dtype, count):
+        '''The view of the next section, of count items of dtype.'''
+        view = np.frombuffer(self.mmap, dtype=dtype, count=count, offset=self._pos)
+        self._pos += view.nbytes + _padding(view.nbytes)
+        if not view.dtype.isnative:  # only on big-endian machines, which need a converted copy
+            view = view.astype(view.dtype.newbyteorder('='))
+        return view
+
+    def name(self, i):
+        '''Get the name of vertex i.'''
+        return bytes(self.names_blob[self.name_offsets[i]:self.name_offsets[i + 1]]).decode('utf-8')
+
+    def csr(self):
+        '''
+        Get the graph as a CSRGraph over the mapped arrays, without copying them.
+
+        The arrays are handed over as memoryviews, which index to plain Python numbers as fast as
+        array.array does. The names are decoded and registered only when first looked up.
+        '''
+        csr = CSRGraph(MappedRegistry(self), memoryview(self.offsets), memoryview(self.targets),
+                       memoryview(self.weights))
+        csr.source = self.filename
+        return csr
+
+    def coords_dict(self):
+        '''Get the coordinates as a dictionary from vertex name to (x, y), as Graph.set_coords takes.'''
+        if self.coords is None:
+            return {}
+        return {self.name(i): (x, y) for i, (x, y) in enumerate(self.coords.tolist()) if not math.isnan(x)}
+
+
+def open_csr(filename):
+    '''Open a graph file as a CSRGraph, see GraphFile.csr.'''
+    return GraphFile(filename).csr()
+
+
+class _NameTable:
+    '''The vertex names of a graph file as a read-only list, decoded on access.'''
+    def __init__(self, graphfile):
+        self.graphfile = graphfile
+
+    def __len__(self):
+        return self.graphfile.n
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError('name index out of range')
+        return self.graphfile.name(i % len(self))
+
+    def __iter__(self):
+        blob = self.graphfile.names_blob.tobytes()
+        bounds = self.graphfile.name_offsets.tolist()
+        return (blob[a:b].decode('utf-8') for a, b in zip(bounds, bounds[1:]))
+
+
+class MappedRegistry(VertexRegistry):
+    '''
+    The VertexRegistry of a graph file: names are read from the file, and the map from name to
+    index is only built the first time a name is looked up. It cannot be added to.
+    '''
+    def __init__(self, graphfile):
+        self.names = _NameTable(graphfile)
+        self._ids = None
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            self._ids = {name: i for i, name in enumerate(self.names)}
+        return self._ids
+
+    def add(self, name):
+        '''Return the index of name, which must be in the file already.'''
+        i = self.get(name)
+        if i is None:
+            raise ValueError('{} is not in the graph file.'.format(name))
+        return i
@@ -1,4 +1,5 @@
-alp = {chr(i + 65): i for i in range(26)}
+from registry import VertexRegistry
+
 with open ('./project2/edge.txt', 'r', encoding = "utf-8") as f:
     data = f.read()
 
@@ -22,12 +23,13 @@ def build_graph(data):
     return graph
 
 
-# Constructing an adjacency matrix
+# Constructing an adjacency matrix, rows and columns in the order of the sorted node names
 def build_matrix(graph):
+    index = VertexRegistry(sorted(graph))
     matrix = [[0 for _ in range(len(graph))] for _ in range(len(graph))]
     for node, edges in graph.items():
         for edge in edges:
-            matrix[alp[node]][alp[edge[0]]] = edge[1]
+            matrix[index[node]][index[edge[0]]] = edge[1]
     return matrix
 
 # graph = build_graph(data)
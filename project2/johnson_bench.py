@@ -0,0 +1,45 @@
+import random
+import apsp
+from mainpj2 import Graph, Vertex
+from benchutil import timed
+
+
+def sparse_graph(n, degree=4):
+    '''A random directed graph with negative edges but no negative cycle: w + p[u] - p[v] for random potentials p.'''
+    random.seed(0)
+    vertices = [Vertex(f'v{i}') for i in range(n)]
+    p = [random.uniform(0, 20) for _ in range(n)]
+    for a in range(n):
+        for b in random.sample(range(n), degree):
+            if b != a:
+                vertices[a].add_neighbour(vertices[b], round(random.uniform(1, 10) + p[a] - p[b], 6))
+    return Graph(vertices)
+
+
+def bellmanford_passes(graph, s):
+    '''The draft Bellman-Ford: n-1 passes over every edge, then a check for negative cycles.'''
+    for v in graph.v:
+        v.set_distance(float('inf'))
+    s.set_distance(0)
+    for _ in range(len(graph.v) - 1):
+        for u in graph.v:
+            for v, w in u.ad.items():
+                if u.d + w < v.d:
+                    v.set_distance(u.d + w)
+    return all(v.d <= u.d + w for u in graph.v for v, w in u.ad.items())
+
+
+if __name__ == "__main__":
+    for n in [100, 400, 1600]:
+        graph = sparse_graph(n)
+        negative = sum(w < 0 for _, _, w in graph.get_edges())
+        print(f'n = {n}, {len(graph.get_edges())} edges, {negative} of them negative')
+        if n <= 400:
+            print(f'  bellmanford, n-1 passes {timed(bellmanford_passes, graph, graph.v[0])[1]:.4f}s')
+        print(f'  bellmanford, queue-based {timed(graph.bellmanford, graph.v[0])[1]:.4f}s')
+        print(f'  johnson {timed(graph.johnson)[1]:.3f}s')
+        graph.spt = {}
+        if n <= 400:
+            print(f'  floydwarshall {timed(graph.floydwarshall)[1]:.3f}s')
+            graph.spt = {}
+        print(f'  floydwarshall_numpy {timed(apsp.floydwarshall, apsp.adjacency_matrix(graph))[1]:.3f}s')
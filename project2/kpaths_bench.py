@@ -0,0 +1,29 @@
+import random
+import time
+from p2p_bench import grid_graph
+
+
+if __name__ == "__main__":
+    for side in [100, 200]:
+        graph = grid_graph(side)
+        random.seed(1)
+        queries = [tuple(random.sample(graph.v, 2)) for _ in range(5)]
+        print(f'n = {len(graph.v)}, {len(queries)} random queries')
+        for k in [1, 2, 3, 5, 10]:
+            start = time.perf_counter()
+            longest = 0
+            for s, t in queries:
+                paths = graph.k_shortest_paths(s, t, k)
+                longest += paths[-1][0] / paths[0][0]
+            elapsed = time.perf_counter() - start
+            print(f'  yen     k = {k:2d}: {elapsed / len(queries) * 1000:8.1f} ms/query, '
+                  f'k-th path {longest / len(queries):.4f} x the shortest')
+        start = time.perf_counter()
+        found = longest = 0
+        for s, t in queries:
+            routes = graph.alternative_routes(s, t, 10)
+            found += len(routes)
+            longest += routes[-1][0] / routes[0][0]
+        elapsed = time.perf_counter() - start
+        print(f'  plateau k = 10: {elapsed / len(queries) * 1000:8.1f} ms/query, {found / len(queries):.1f} routes, '
+              f'the last {longest / len(queries):.4f} x the shortest')
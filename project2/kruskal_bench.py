@@ -0,0 +1,44 @@
+from csr_bench import grid_edges, build_graph
+from csrgraph import CSRGraph
+from benchutil import timed
+
+
+def kruskal_objects(graph):
+    '''The previous Graph.mst_kruskal: every arc sorted by a key function, union-find on Vertex attributes.'''
+    def findset(x):
+        if x != x.pi:
+            x.pi = findset(x.pi)
+        return x.pi
+
+    mst = []
+    for v in graph.v:
+        v.pi = v
+        v.rank = 0
+    edges = graph.get_edges()
+    edges.sort(key=lambda x: x[2])
+    for u, v, w in edges:
+        ru, rv = findset(u), findset(v)
+        if ru != rv:
+            mst.append((u, v, w))
+            if ru.rank > rv.rank:
+                rv.pi = ru
+            else:
+                ru.pi = rv
+                if ru.rank == rv.rank:
+                    rv.rank += 1
+    return mst
+
+
+if __name__ == "__main__":
+    for side in [30, 100, 300]:
+        names = [f'v{i}' for i in range(side * side)]
+        edges = grid_edges(side)
+        graph = build_graph(names, edges)
+        csr = CSRGraph.from_edges(names, edges)
+        print(f'n = {len(names)}, {len(edges)} edges')
+        old, t_old = timed(kruskal_objects, graph)
+        new, t_new = timed(graph.mst_kruskal)
+        arrays, t_arrays = timed(csr.mst_kruskal)
+        assert round(sum(w for _, _, w in old), 6) == round(sum(w for _, _, w in new), 6) \
+            == round(sum(w for _, _, w in arrays), 6)
+        print(f'  Graph objects {t_old:.4f}s, Graph via arrays {t_new:.4f}s, CSR arrays {t_arrays:.4f}s')
@@ -0,0 +1,79 @@
+import os
+from array import array
+import numpy as np
+from csrgraph import CSRGraph
+from graphfile import GraphFile, save_graph
+from registry import VertexRegistry
+
+
+def load_csr(filename, directed=False, cache=True, chunk=1 << 20):
+    '''
+    Load an edge list such as edge.txt into a CSRGraph without building any Vertex.
+
+    The file is read chunk by chunk. Each chunk is split into tokens at once and its columns go
+    straight into compact arrays of vertex ids and weights, so only one chunk of text is in
+    memory at a time. The arcs are then counted per vertex and filled in by a stable sort.
+    Vertices are numbered in the order they first appear in the file, reading each line from
+    tail to head. Of parallel edges only the lightest is kept, as Graph.init_adjlist does.
+
+    With cache, the graph is also written to filename.graph in the binary graph format, which
+    later calls open instead of parsing the text as long as it is newer than the text file.
+
+    Parameters:
+        - filename: the edge list, one "u v weight" line per edge, lines starting with # skipped.
+        - directed: whether each line is a one-way edge, default is False.
+        - cache: whether to use the binary cache, default is True.
+        - chunk: about how many bytes of text to parse at once, default is 1 MiB.
+    '''
+    cached = filename + '.graph'
+    if cache and os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(filename):
+        graphfile = GraphFile(cached)
+        if graphfile.directed == directed:
+            return graphfile.csr()
+    index = VertexRegistry()
+    add = index.add
+    tails, heads, weights = array('i'), array('i'), array('d')
+    with open(filename, 'r', encoding='utf-8') as f:
+        while True:
+            lines = f.readlines(chunk)
+            if not lines:
+                break
+            tokens = ''.join(line for line in lines if not line.startswith('#')).split()
+            if len(tokens) % 3:
+                raise ValueError('Each edge of {} must be "u v weight".'.format(filename))
+            weights.extend(map(float, tokens[2::3]))
+            del tokens[2::3]
+            ids = [add(name) for name in tokens]  # tail and head of each line in turn
+            tails.extend(ids[0::2])
+            heads.extend(ids[1::2])
+    csr = _fill(index, np.frombuffer(tails, dtype=np.int32), np.frombuffer(heads, dtype=np.int32),
+                np.frombuffer(weights, dtype=np.float64), directed)
+    if cache:
+        save_graph(cached, csr, directed)
+    return csr
+
+
+def _fill(index, tails, heads, weights, directed):
+    '''Build the CSR arrays from the edge columns: drop parallel arcs, count the arcs of each vertex, then place them.'''
+    if not directed:  # each edge is an arc both ways
+        tails, heads = np.concatenate((tails, heads)), np.concatenate((heads, tails))
+        weights = np.concatenate((weights, weights))
+    n = len(index)
+    # of the arcs with the same ends keep the lightest, then put them back in file order
+    arc = tails.astype(np.int64) * n + heads
+    order = np.lexsort((weights, arc))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = arc[order[1:]] != arc[order[:-1]]
+    keep = np.sort(order[first])
+    tails, heads, weights = tails[keep], heads[keep], weights[keep]
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tails, minlength=n), out=offsets[1:])
+    order = np.argsort(tails, kind='stable')  # keeps the arcs of a vertex in file order
+    return CSRGraph(index, _to_array('q', offsets), _to_array('i', heads[order]), _to_array('d', weights[order]))
+
+
+def _to_array(typecode, values):
+    '''Copy a NumPy array into an array.array, which is faster to index from Python.'''
+    result = array(typecode)
+    result.frombytes(np.ascontiguousarray(values).tobytes())
+    return result
@@ -0,0 +1,56 @@
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+
+def write_grid(filename, side):
+    '''Write a side x side grid road network as an edge list like edge.txt, and return the number of edges.'''
+    random.seed(0)
+    m = 0
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(f'# {side * side} vertices\n')
+        for r in range(side):
+            for c in range(side):
+                if c + 1 < side:
+                    f.write(f'v{r}_{c} v{r}_{c + 1} {random.uniform(1, 10):.2f}\n')
+                    m += 1
+                if r + 1 < side:
+                    f.write(f'v{r}_{c} v{r + 1}_{c} {random.uniform(1, 10):.2f}\n')
+                    m += 1
+    return m
+
+
+def run(how, filename):
+    '''Load filename one way, and print the seconds it took and the peak RSS in KiB.'''
+    start = time.perf_counter()
+    if how == 'init_adjlist':
+        from mainpj2 import Graph
+        Graph().init_adjlist(filename)
+    elif how == 'init_binary':
+        from mainpj2 import Graph
+        Graph().init_binary(filename + '.graph')
+    else:
+        from loader import load_csr
+        load_csr(filename, cache=how != 'load_csr')
+    print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3:  # one measurement, in a fresh process so that the peak RSS is its own
+        run(sys.argv[1], sys.argv[2])
+        sys.exit()
+    filename = './project2/loader_bench.txt'
+    for side in [300, 700]:
+        m = write_grid(filename, side)
+        print(f'{m} edges, {os.path.getsize(filename) / 2**20:.1f} MiB of text')
+        # cached writes the cache, then cached again maps it, as does init_binary
+        for how in ['init_adjlist', 'load_csr', 'cached', 'cached', 'init_binary']:
+            out = subprocess.run([sys.executable, __file__, how, filename], capture_output=True, text=True,
+                                 cwd=os.getcwd(), check=True).stdout.split()
+            seconds, rss = float(out[0]), int(out[1])
+            print(f'  {how:12s} {seconds:7.3f}s, {m / seconds / 1e6:6.2f} M edges/s, peak RSS {rss / 1024:7.1f} MiB')
+        os.remove(filename + '.graph')
+    os.remove(filename)
@@ -1,26 +1,30 @@
 import heapq
+import math
+from collections import deque
+from csrgraph import CSRGraph
+from dheap import DaryHeap
+from registry import VertexRegistry
 
 
-alp = {chr(i + 65): i for i in range(26)}  # A-Z -> 0-25
-
 class Vertex:
     def __init__(self, id):
         '''
         Initialize a vertex of the graph.
         
         Parameters:
-            - id: the id of the vertex, letter A-Z in this case.
+            - id: the id of the vertex, any string, e.g., letter A-Z in edge.txt.
             - ad: a dictionary of the adjacent vertices of the vertex, e.g., {'B': 7.64, 'F': 5.43}.
             - d: the distance from some source vertex to the vertex, default is infinity.
             - pi: the predecessor of the vertex, default is None.
-            - paths: a list of paths from some source vertex to the vertex, e.g., [[A, B, C], [A, D, C]].
+            - preds: the predecessors of the vertex on all shortest paths from some source vertex, e.g., [B, D].
+            - count: the number of shortest paths from some source vertex to the vertex, default is 0.
         '''
         self.id = id
         self.ad = {}
         self.d = float('inf')
         self.pi = None
-        self.paths = []
-        self.rank = 0  # only used in union-by-rank in Kruskal's algorithm
+        self.preds = []
+        self.count = 0
     
     def add_neighbour(self, neighbour, weight):
         '''Add a neighbour to the vertex.'''
@@ -34,10 +38,6 @@ class Vertex:
         '''Set the predecessor of the vertex.'''
         self.pi = predecessor
     
-    def set_rank(self, rank):
-        '''Set the rank of the vertex.'''
-        self.rank = rank
-        
     def __str__(self):
         """ String representation of the vertex. """
         return self.id
@@ -61,13 +61,148 @@ class Graph:
         
         Parameters:
             - vertices: a list of vertices in the graph, default is None.
-            - allpaths: a 2D list of all shortest paths between any two vertices, e.g., all_paths[U][V] = [[U, X, Y, V], [U, Z, V], ...]
+            - index: the registry mapping vertex ids to their positions in v.
+            - spt: the shortest-path DAGs of the sources computed so far, as a dictionary from the index of
+              a source to (distances, predecessor lists, path counts), each a list over all vertices.
+              The paths themselves are enumerated on demand by iter_paths.
+            - coords: the coordinates of the vertices used by the A* heuristic, e.g., coords['A'] = (55, 164).
+            - settled: the number of vertices settled by the last shortest-path search.
+            - next_hop: the next-hop matrix left by the NumPy all-pairs methods, next_hop[U][V] being the vertex after U.
+            - negative_cycle: the negative-weight cycle found by the last bellmanford, e.g., [B, C, D], or None.
+            - version: the number of times the graph has changed, see changed.
+            - directed: whether the edges are one-way, as given to init_adjlist.
+            - spt_repair: the function repairing spt after edges change, None if spt is dropped instead;
+              set by ShortestPathService.
+            - watchers: functions keeping other data in step with the graph, called with the changed edges.
+            - guards: functions called with the edges about to change, as (u, v, old weight, new weight)
+              like the arcs of changed, which raise ValueError to refuse the change.
+            - reverse: the edges into each vertex of a directed graph, reverse[v][u] being the weight of
+              (u, v), built by in_edges when first needed and kept up to date by the methods changing
+              the graph; None when not built.
         '''
         self.v = vertices if vertices is not None else []
-        self.allpaths = [[[] for _ in range(len(self.v))] for _ in range(len(self.v))]
-        
-        for i in range(len(self.v)):
-            self.allpaths[i][i].append([self.v[i]])
+        self.index = VertexRegistry(u.id for u in self.v)
+        self.spt = {}
+        self.coords = {}
+        self._hscale = 0  # km per unit of coordinate distance, see set_coords
+        self._coords_complete = False  # whether every vertex has coordinates, see set_coords
+        self.next_hop = None
+        self.negative_cycle = None
+        self.settled = 0
+        self.version = 0
+        self.directed = False
+        self.spt_repair = None
+        self.watchers = []
+        self.guards = []
+        self.reverse = None
+
+    def vertex(self, id):
+        '''Get the vertex with the given id.'''
+        return self.v[self.index[id]]
+
+    def changed(self, arcs=None):
+        '''
+        Record that the graph has changed, dropping the shortest paths computed on the old one.
+
+        Parameters:
+            - arcs: the changed edges as (u, v, old weight, new weight) tuples of vertex indices and
+              weights, None standing for a missing edge; default is None, meaning anything may have
+              changed. If spt_repair is set it is given the arcs to repair the shortest paths
+              instead. An empty list means that only vertices were added. The watchers are then
+              called with the arcs, None included.
+        '''
+        self.version += 1
+        self.next_hop = None
+        if arcs is None:
+            self.reverse = None
+            self._coords_complete = all(u.id in self.coords for u in self.v)
+        if arcs is not None and self.spt_repair is not None:
+            self.spt_repair(arcs)
+        elif arcs != []:
+            self.spt.clear()
+        for watcher in self.watchers:
+            watcher(arcs)
+
+    '''
+    For changing the graph.
+    '''
+
+    def add_vertex(self, id):
+        '''Add a vertex without edges to the graph, and return it.'''
+        if id in self.index:
+            raise ValueError('Vertex {} already exists.'.format(id))
+        u = Vertex(id)
+        self.index.add(id)
+        self.v.append(u)
+        if self.reverse is not None:
+            self.reverse[u] = {}
+        self._coords_complete = self._coords_complete and id in self.coords
+        if self.spt_repair is None:  # else the trees are extended by spt_repair
+            for d, preds, count in self.spt.values():  # u is unreachable from every source
+                d.append(float('inf'))
+                preds.append([])
+                count.append(0)
+        self.changed([])
+        return u
+
+    def _set_weight(self, u, v, weight):
+        '''
+        Set the weight of edge (u, v), both ways unless the graph is directed, None removing it.
+
+        The guards see the change first, and nothing is changed if one of them refuses it. A
+        lighter edge may make the A* heuristic overestimate, so its scale is lowered to the ratio
+        of the new weight to the edge length if that is smaller.
+        '''
+        pairs = [(u, v)] if self.directed else [(u, v), (v, u)]
+        arcs = [(self.index[a.id], self.index[b.id], a.ad.get(b), weight) for a, b in pairs]
+        for guard in self.guards:
+            guard(arcs)
+        for a, b in pairs:
+            if weight is None:
+                del a.ad[b]
+            else:
+                a.ad[b] = weight
+            if self.reverse is not None:
+                if weight is None:
+                    del self.reverse[b][a]
+                else:
+                    self.reverse[b][a] = weight
+        if weight is not None and u.id in self.coords and v.id in self.coords:
+            length = math.dist(self.coords[u.id], self.coords[v.id])
+            if length > 0:
+                self._hscale = min(self._hscale, weight / length)
+        self.changed(arcs)
+
+    def add_edge(self, u, v, weight):
+        '''Add the edge (u, v), or change its weight if it exists.'''
+        self._set_weight(u, v, weight)
+
+    def update_weight(self, u, v, weight):
+        '''Change the weight of the edge (u, v).'''
+        if v not in u.ad:
+            raise ValueError('No edge from {} to {} exists.'.format(u.id, v.id))
+        self._set_weight(u, v, weight)
+
+    def remove_edge(self, u, v):
+        '''Remove the edge (u, v).'''
+        if v not in u.ad:
+            raise ValueError('No edge from {} to {} exists.'.format(u.id, v.id))
+        self._set_weight(u, v, None)
+
+    def in_edges(self):
+        '''
+        Get a function giving the (vertex, weight) edges into a vertex: its adjacency list when
+        the graph is undirected, otherwise its entry of self.reverse, which is built the first time.
+        '''
+        if not self.directed:
+            return lambda v: v.ad.items()
+        if self.reverse is None:
+            self.reverse = {u: {} for u in self.v}
+            for u in self.v:
+                for v, w in u.ad.items():
+                    self.reverse[v][u] = w
+        reverse = self.reverse
+        return lambda v: reverse[v].items()
     
     def get_edges(self):
         '''Get the edges of the graph.'''
@@ -83,10 +218,14 @@ class Graph:
         matrix = [[float('inf')] * n for _ in range(n)]
         for u in self.v:
             for v in u.ad:
-                matrix[alp[u.id]][alp[v.id]] = u.ad[v]
+                matrix[self.index[u.id]][self.index[v.id]] = u.ad[v]
         for i in range(n):
             matrix[i][i] = 0
         return matrix
+
+    def to_csr(self):
+        '''Get the graph in compressed sparse row form, vertex i being self.v[i].'''
+        return CSRGraph.from_graph(self)
     
     '''
     For finding the single-source shortest path.
@@ -97,49 +236,329 @@ class Graph:
         for v in self.v:
             v.set_distance(float('inf'))
             v.set_predecessor(None)
-            v.paths = []
+            v.preds = []
+            v.count = 0
         s.set_distance(0)
-        s.paths = [[s]]
+        s.count = 1
         
     def _relax(self, u, v):
-        '''Relax the edge (u, v).'''
+        '''Relax the edge (u, v), u being settled so that u.count is final.'''
         if v.d > u.d + u.ad[v]:
             v.set_distance(u.d + u.ad[v])
             v.set_predecessor(u)
-            v.paths = [path + [v] for path in u.paths]  # update the paths
+            v.preds = [u]  # u is the only predecessor so far
+            v.count = u.count
         # if there are multiple shortest paths
         elif v.d == u.d + u.ad[v]:
-            add_paths = [path + [v] for path in u.paths]  # add the paths
-            v.paths.extend(add_paths)
+            v.preds.append(u)
+            v.count += u.count
     
-    def dijkstra(self, s):
-        '''Dijkstra's algorithm for finding the single-source shortest path.'''
+    def dijkstra(self, s, arity=4, heap=DaryHeap):
+        '''
+        Dijkstra's algorithm for finding the single-source shortest path.
+
+        Parameters:
+            - arity: the number of children of each node of the priority queue, default is 4.
+            - heap: the priority queue class, called with the number of vertices and arity,
+              default is DaryHeap.
+        '''
         # initialize the single-source shortest path
         self._inti_singlesource(s)
-        # initialize the priority queue
-        pq = []
-        # initialize the vertices
-        for v in self.v:
-            heapq.heappush(pq, (v.d, v))
-        s.paths = [[s]]  # initialize the paths
+        index = self.index
+        # initialize the priority queue, keyed by vertex index
+        pq = heap(len(self.v), arity)
+        pq.push(index[s.id], 0)
+        self.settled = 0
         # while the priority queue is not empty
         while pq:
             # extract the vertex with the minimum distance
-            cur_d, u = heapq.heappop(pq)
-            if cur_d > u.d:  # if the distance is not updated, skip
-                continue
+            u = self.v[pq.pop()[0]]
+            self.settled += 1
             # for each vertex v adjacent to u
             for v in u.ad:
                 old_d = v.d
                 # relax the edge (u, v)
                 self._relax(u, v)
-                # if the distance is updated, reinsert v with new distance
+                # if the distance is updated, insert v or decrease its key
                 if v.d < old_d:
-                    heapq.heappush(pq, (v.d, v))
-        # update the allpaths
-        for u in self.v:
-            self.allpaths[alp[s.id]][alp[u.id]] = u.paths
+                    pq.push_or_decrease(index[v.id], v.d)
+        # store the shortest-path DAG
+        self.spt[self.index[s.id]] = ([u.d for u in self.v], [u.preds for u in self.v], [u.count for u in self.v])
     
+    '''
+    For finding the point-to-point shortest path.
+    '''
+
+    def bidijkstra(self, s, t):
+        '''
+        Bidirectional Dijkstra's algorithm for finding the shortest path from s to t.
+
+        A forward search from s and a backward search from t take turns on the side with the
+        smaller key, and stop once the two keys add up to the best path seen. The backward search
+        follows the edges into each vertex, see in_edges.
+
+        Returns:
+            - (the length of the path, the path as a list of vertices), or (infinity, []) if there is none.
+        '''
+        dist = ({s: 0}, {t: 0})
+        pred = ({s: None}, {t: None})
+        done = (set(), set())
+        pqs = ([(0, s)], [(0, t)])
+        best, meet = (0, s) if s is t else (float('inf'), None)
+        edges = (lambda u: u.ad.items(), self.in_edges())
+        self.settled = 0
+        while pqs[0] and pqs[1] and pqs[0][0][0] + pqs[1][0][0] < best:
+            side = 0 if pqs[0][0][0] <= pqs[1][0][0] else 1
+            cur_d, u = heapq.heappop(pqs[side])
+            if u in done[side]:
+                continue
+            done[side].add(u)
+            self.settled += 1
+            d, other = dist[side], dist[1 - side]
+            for v, w in edges[side](u):
+                if cur_d + w < d.get(v, float('inf')):
+                    d[v] = cur_d + w
+                    pred[side][v] = u
+                    heapq.heappush(pqs[side], (d[v], v))
+                if v in other and d[v] + other[v] < best:  # a path through v
+                    best, meet = d[v] + other[v], v
+        if meet is None:
+            return float('inf'), []
+        path = []
+        u = meet
+        while u is not None:  # back to s
+            path.append(u)
+            u = pred[0][u]
+        path.reverse()
+        u = pred[1][meet]
+        while u is not None:  # on to t
+            path.append(u)
+            u = pred[1][u]
+        return best, path
+
+    def set_coords(self, coords):
+        '''
+        Set the coordinates of the vertices for the A* heuristic.
+
+        The heuristic is the straight-line distance scaled by the smallest ratio of edge weight
+        to edge length, so it never overestimates whatever units the coordinates are in.
+
+        Parameters:
+            - coords: a dictionary from vertex id to (x, y).
+        '''
+        self.coords = dict(coords)
+        self._coords_complete = all(u.id in self.coords for u in self.v)
+        self._hscale = float('inf')
+        for u, v, w in self.get_edges():
+            if u.id in self.coords and v.id in self.coords:
+                length = math.dist(self.coords[u.id], self.coords[v.id])
+                if length > 0:
+                    self._hscale = min(self._hscale, w / length)
+        if self._hscale == float('inf'):
+            self._hscale = 0
+
+    def astar(self, s, t):
+        '''
+        A* search for finding the shortest path from s to t, guided by the coordinates from set_coords.
+
+        Without coordinates for every vertex the heuristic is 0 and this is Dijkstra's algorithm
+        stopped at t.
+
+        Returns:
+            - (the length of the path, the path as a list of vertices), or (infinity, []) if there is none.
+        '''
+        coords = self.coords
+        if self._coords_complete:
+            tx, ty = coords[t.id]
+            scale = self._hscale
+            h = lambda v: scale * math.hypot(coords[v.id][0] - tx, coords[v.id][1] - ty)
+        else:
+            h = lambda v: 0
+        dist = {s: 0}
+        pred = {s: None}
+        pq = [(h(s), 0, s)]
+        self.settled = 0
+        while pq:
+            _, cur_d, u = heapq.heappop(pq)
+            if cur_d > dist[u]:  # if the distance is not updated, skip
+                continue
+            self.settled += 1
+            if u is t:
+                path = []
+                while u is not None:
+                    path.append(u)
+                    u = pred[u]
+                return cur_d, path[::-1]
+            for v, w in u.ad.items():
+                if cur_d + w < dist.get(v, float('inf')):
+                    dist[v] = cur_d + w
+                    pred[v] = u
+                    heapq.heappush(pq, (dist[v] + h(v), dist[v], v))
+        return float('inf'), []
+
+    '''
+    For finding alternative routes.
+    '''
+
+    def _tree(self, s, reverse=False, arity=4):
+        '''
+        Dijkstra's algorithm keeping one predecessor per vertex, on vertex indices.
+
+        Parameters:
+            - reverse: whether to follow the edges backwards, giving the distances to s, default is False.
+
+        Returns:
+            - dist: list of the distance from s (to s if reverse) of each vertex.
+            - pi: list of the vertex before each one on its path from s (after it on its path
+              to s if reverse), -1 for s and unreachable vertices.
+        '''
+        index, V = self.index, self.v
+        edges = self.in_edges() if reverse else (lambda v: v.ad.items())
+        n = len(V)
+        dist = [float('inf')] * n
+        pi = [-1] * n
+        pq = DaryHeap(n, arity)
+        dist[index[s.id]] = 0
+        pq.push(index[s.id], 0)
+        while pq:
+            i, d = pq.pop()
+            for v, w in edges(V[i]):
+                j = index[v.id]
+                if d + w < dist[j]:
+                    dist[j], pi[j] = d + w, i
+                    pq.push_or_decrease(j, d + w)
+        return dist, pi
+
+    def k_shortest_paths(self, s, t, k):
+        '''
+        Yen's algorithm for finding the k shortest loopless paths from s to t.
+
+        Each new path branches off a path found before at some spur vertex, avoiding the root
+        of that path and the edges the earlier paths with the same root took next. The tree of
+        shortest paths to t is computed once and reused by every spur search: if the tree path
+        from the spur vertex avoids what is removed it is the answer right away, otherwise the
+        tree distances guide an A* search, as removing edges never makes them overestimate.
+
+        Returns:
+            - list of at most k (length, path as a list of vertices), shortest first.
+        '''
+        index, V = self.index, self.v
+        si, ti = index[s.id], index[t.id]
+        dt, nxt = self._tree(t, reverse=True)
+        if dt[si] == float('inf'):
+            return []
+        found = [(dt[si], self._follow(nxt, si))]
+        candidates = []  # heap of (length, path)
+        seen = {tuple(found[0][1])}
+        while len(found) < k:
+            last = found[-1][1]
+            root_length = 0
+            for j in range(len(last) - 1):
+                spur = last[j]
+                root = last[:j + 1]
+                blocked = {p[j + 1] for _, p in found if p[:j + 1] == root}  # next vertices taken from spur
+                spur_length, spur_path = self._spur(spur, ti, set(root[:-1]), blocked, dt, nxt)
+                if spur_path:
+                    path = root[:-1] + spur_path
+                    if tuple(path) not in seen:
+                        seen.add(tuple(path))
+                        heapq.heappush(candidates, (root_length + spur_length, path))
+                root_length += V[spur].ad[V[last[j + 1]]]
+            if not candidates:
+                break
+            found.append(heapq.heappop(candidates))
+        return [(length, [V[i] for i in path]) for length, path in found]
+
+    def _follow(self, pi, i):
+        '''The path of vertex indices from i along pi until -1.'''
+        path = [i]
+        while pi[i] != -1:
+            i = pi[i]
+            path.append(i)
+        return path
+
+    def _spur(self, spur, ti, removed, blocked, dt, nxt):
+        '''
+        Find the shortest path from the spur vertex to ti avoiding the removed vertices and
+        the edges from spur to the blocked vertices, for k_shortest_paths.
+
+        Returns:
+            - (the length, the path as a list of vertex indices), or (infinity, []) if there is none.
+        '''
+        index, V = self.index, self.v
+        if dt[spur] == float('inf'):
+            return float('inf'), []
+        path = self._follow(nxt, spur)
+        if path[-1] == ti and (len(path) < 2 or path[1] not in blocked) and removed.isdisjoint(path):
+            return dt[spur], path
+        # A* guided by the distances to t of the tree
+        dist = {spur: 0}
+        pred = {spur: -1}
+        pq = [(dt[spur], 0, spur)]
+        while pq:
+            _, d, i = heapq.heappop(pq)
+            if d > dist[i]:
+                continue
+            if i == ti:
+                return d, self._follow(pred, i)[::-1]
+            for v, w in V[i].ad.items():
+                j = index[v.id]
+                if j in removed or (i == spur and j in blocked) or dt[j] == float('inf'):
+                    continue
+                if d + w < dist.get(j, float('inf')):
+                    dist[j] = d + w
+                    pred[j] = i
+                    heapq.heappush(pq, (d + w + dt[j], d + w, j))
+        return float('inf'), []
+
+    def alternative_routes(self, s, t, k=3, stretch=1.4):
+        '''
+        Find up to k alternative routes from s to t by the plateau method, from just two Dijkstra runs.
+
+        A plateau is a chain of edges that lies both on the tree of shortest paths from s and on
+        the tree of shortest paths to t. Following the first tree to a plateau, along it and then
+        the second tree gives a route that is locally a shortest path, and the longer the plateau
+        the more natural the route. The shortest path itself is the longest plateau.
+
+        Parameters:
+            - k: the most routes returned, default is 3.
+            - stretch: the longest route returned, as a multiple of the shortest, default is 1.4.
+
+        Returns:
+            - list of (length, path as a list of vertices), shortest first.
+        '''
+        index, V = self.index, self.v
+        si, ti = index[s.id], index[t.id]
+        ds, prev = self._tree(s)
+        dt, nxt = self._tree(t, reverse=True)
+        best = ds[ti]
+        if best == float('inf'):
+            return []
+        plateaus = []
+        for a in range(len(V)):
+            if ds[a] + dt[a] > stretch * best:
+                continue
+            if prev[a] != -1 and nxt[prev[a]] == a:  # not the start of a plateau
+                continue
+            b = a
+            while nxt[b] != -1 and prev[nxt[b]] == b:
+                b = nxt[b]
+            if b != a:
+                plateaus.append((ds[b] - ds[a], a, b))
+        plateaus.sort(reverse=True)
+        routes = []
+        seen = set()
+        for _, a, b in plateaus:
+            path = self._follow(prev, a)[::-1] + self._follow(nxt, a)[1:]  # the plateau is on the way to t
+            if len(set(path)) < len(path) or tuple(path) in seen:  # skip routes with a loop
+                continue
+            seen.add(tuple(path))
+            routes.append((ds[a] + dt[a], [V[i] for i in path]))
+            if len(routes) == k:
+                break
+        routes.sort(key=lambda route: route[0])
+        return routes
+
     '''
     For finding the all-pairs shortest path.
     '''
@@ -148,55 +567,276 @@ class Graph:
         '''Floyd-Warshall algorithm for finding the all-pairs shortest path.'''
         W = self.get_matrix()  # get the adjacency matrix
         n = len(W)
-        D = W.copy()  # initialize the distance matrix
-        # initialize the allpaths
-        self.allpaths = [[[] for _ in range(n)] for _ in range(n)]
-        for i in range(n):
-            for j in range(n):
-                if i == j:
-                    self.allpaths[i][j] = [[self.v[i]]]
-                elif W[i][j] != float('inf'):
-                    self.allpaths[i][j] = [[self.v[i], self.v[j]]]
-        # Update the distance and paths matrices
+        D = [row[:] for row in W]  # initialize the distance matrix
+        # update the distance matrix
         for k in range(n):
-            Dk = D.copy()
+            Dk = D[k]
             for i in range(n):
+                Di = D[i]
+                dik = Di[k]
                 for j in range(n):
-                    if D[i][j] > D[i][k] + D[k][j]:
-                        Dk[i][j] = D[i][k] + D[k][j]
-                        # update the paths
-                        self.allpaths[i][j] = [
-                            path1 + (path2 if len(path2) == 1 else path2[1:])
-                            for path1 in self.allpaths[i][k]
-                            for path2 in self.allpaths[k][j]
-                        ]
-                    elif D[i][j] == D[i][k] + D[k][j] and i != k and j != k:
-                        # add the paths
-                        add_paths = [path1 + path2[1:] for path1 in self.allpaths[i][k] for path2 in self.allpaths[k][j]]
-                        for path in add_paths:
-                            if path not in self.allpaths[i][j]:
-                                self.allpaths[i][j].append(path)
-            D = Dk.copy()
+                    if Di[j] > dik + Dk[j]:
+                        Di[j] = dik + Dk[j]
+        # rebuild the shortest-path DAG of every source from its distances
+        for i in range(n):
+            self._spt_from_distances(i, D[i])
+        return D
+
+    def floydwarshall_numpy(self):
+        '''
+        Floyd-Warshall algorithm on NumPy arrays, keeping a next-hop matrix instead of paths.
+
+        Returns:
+            - D: the matrix of shortest distances, as a NumPy array.
+        '''
+        import apsp  # NumPy is only needed here
+        D, self.next_hop = apsp.floydwarshall(apsp.adjacency_matrix(self))
         return D
+
+    def floydwarshall_blocked(self, block=256, workers=4):
+        '''
+        Blocked Floyd-Warshall algorithm on NumPy arrays, the tiles of each phase run in worker processes.
+
+        Returns:
+            - D: the matrix of shortest distances, as a NumPy array.
+        '''
+        import apsp
+        D, self.next_hop = apsp.floydwarshall_blocked(apsp.adjacency_matrix(self), block, workers)
+        return D
+
+    def dijkstra_allpairs_parallel(self, workers=4, filename=None):
+        '''
+        All-pairs shortest paths by Dijkstra from every source on the CSR form of the graph, in worker processes.
+
+        Parameters:
+            - workers: the number of worker processes, default is 4.
+            - filename: if given, the result is memory-mapped to files starting with filename, default is None.
+
+        Returns:
+            - D: the matrix of shortest distances, as a NumPy array.
+        '''
+        import apsp
+        D, self.next_hop = apsp.dijkstra_allpairs(self.to_csr(), workers, filename)
+        return D
+
+    def get_fw_path(self, u, v):
+        '''Get a shortest path from vertex u to vertex v as a list of vertices, after an all-pairs run on NumPy.'''
+        import apsp
+        return [self.v[i] for i in apsp.path(self.next_hop, self.index[u.id], self.index[v.id])]
+
+    def _spt_from_distances(self, sid, d):
+        '''
+        Build the shortest-path DAG of source sid from its final distances d.
+
+        The predecessors of v are the neighbours p with d[p] + w(p, v) == d[v]; the sums are
+        compared with a small tolerance, as d was added up in a different order. The counts
+        are then summed over the predecessors in order of increasing distance.
+        '''
+        index = self.index
+        preds = [[] for _ in self.v]
+        for p in self.v:
+            dp = d[index[p.id]]
+            for v, w in p.ad.items():
+                j = index[v.id]
+                if j != sid and abs(dp + w - d[j]) <= 1e-9 * max(1, d[j]):
+                    preds[j].append(p)
+        count = [0] * len(self.v)
+        count[sid] = 1
+        for j in sorted(range(len(self.v)), key=lambda j: d[j]):
+            if j != sid:
+                count[j] = sum(count[index[p.id]] for p in preds[j])
+        self.spt[sid] = (list(d), preds, count)
     
     def dijkstra_allpairs(self):
         '''Dijkstra's algorithm for finding the all-pairs shortest path.'''
-        # initialize the allpaths
-        for i in range(len(self.v)):
-            self.allpaths[i][i].append([self.v[i]])
         # for each vertex s
         for s in self.v:
             self.dijkstra(s)
 
-    def get_pathstr(self, u, v):
-        '''Get the shortest path from vertex u to vertex v as a string.'''
-        paths = self.allpaths[alp[u.id]][alp[v.id]]
-        if not paths:
-            return 'No path from {} to {} exists.'.format(u.id, v.id)
+    '''
+    For graphs with negative edge weights.
+    '''
+
+    def bellmanford(self, s=None):
+        '''
+        Bellman-Ford algorithm for finding the single-source shortest path, queue-based (SPFA).
+
+        Only the vertices whose distance has just dropped are queued to relax their edges, so the
+        search ends as soon as no distance changes. When the path of a vertex reaches n edges, its
+        predecessors are walked back: a cycle among them has negative weight, and is stored in
+        self.negative_cycle.
+
+        Parameters:
+            - s: the source vertex, default is None, meaning a virtual source with a 0 edge to
+              every vertex (as Johnson's algorithm adds).
+
+        Returns:
+            - False if there is a negative-weight cycle (reachable from s), True otherwise.
+              The distances and predecessors are left in the vertices.
+        '''
+        n = len(self.v)
+        for v in self.v:
+            v.set_distance(float('inf') if s is not None else 0)
+            v.set_predecessor(None)
+        queue = deque([s] if s is not None else self.v)
+        if s is not None:
+            s.set_distance(0)
+        length = {v: 0 for v in queue}  # the number of edges on the current path
+        in_queue = set(queue)
+        self.negative_cycle = None
+        while queue:
+            u = queue.popleft()
+            in_queue.discard(u)
+            for v, w in u.ad.items():
+                if u.d + w < v.d:
+                    v.set_distance(u.d + w)
+                    v.set_predecessor(u)
+                    length[v] = length[u] + 1
+                    if length[v] >= n:  # a path this long repeats a vertex
+                        cycle, length[v] = self._find_cycle(v)
+                        if cycle:
+                            self.negative_cycle = cycle
+                            return False
+                    if v not in in_queue:
+                        queue.append(v)
+                        in_queue.add(v)
+        return True
+
+    def _find_cycle(self, v):
+        '''
+        Walk back the predecessors of v.
+
+        Returns:
+            - (the cycle they run into as a list of vertices in order, 0), or ([], the number of edges
+              back to a vertex without predecessor) if there is no cycle.
+        '''
+        seen = set()
+        while v not in seen:  # walk back until a vertex repeats
+            seen.add(v)
+            if v.pi is None:
+                return [], len(seen) - 1
+            v = v.pi
+        cycle = [v]
+        u = v.pi
+        while u is not v:
+            cycle.append(u)
+            u = u.pi
+        return cycle[::-1], 0
+
+    def johnson(self):
+        '''
+        Johnson's algorithm for finding the all-pairs shortest path, for graphs with negative edge weights.
+
+        Bellman-Ford from a virtual source gives each vertex a potential h; the edges reweighted
+        to w + h[u] - h[v] are non-negative, so Dijkstra's algorithm runs from every source on
+        them. The shortest-path DAGs are kept in self.spt with the distances mapped back, and the
+        original weights are restored afterwards.
+
+        Returns:
+            - D: the matrix of shortest distances, or False if there is a negative-weight cycle.
+        '''
+        if not self.bellmanford():
+            return False
+        h = {v: v.d for v in self.v}
+        saved = [dict(u.ad) for u in self.v]
+        try:
+            for u in self.v:
+                for v in u.ad:
+                    u.ad[v] = max(0, u.ad[v] + h[u] - h[v])  # clip rounding errors below 0
+            D = []
+            for s in self.v:
+                self.dijkstra(s)
+                sid = self.index[s.id]
+                d, preds, _ = self.spt[sid]
+                d = [d[j] + h[v] - h[s] for j, v in enumerate(self.v)]
+                self.spt[sid] = (d, preds, self._count_paths(sid, preds))
+                D.append(d)
+        finally:
+            for u, ad in zip(self.v, saved):
+                u.ad = ad
+        return D
+
+    def _count_paths(self, sid, preds):
+        '''
+        Count the shortest paths from sid over the predecessor lists, each vertex after its predecessors.
+
+        Unlike the counts kept by dijkstra this does not rely on the order the vertices were settled
+        in, which ties through 0-weight edges can upset.
+        '''
+        index = self.index
+        count = [None] * len(self.v)
+        for j in range(len(self.v)):
+            stack = [j]
+            while stack:
+                x = stack[-1]
+                if count[x] is not None and count[x] != -1:
+                    stack.pop()
+                    continue
+                count[x] = -1  # in progress, predecessors on a 0-weight cycle are left out
+                pending = [i for i in (index[p.id] for p in preds[x]) if count[i] is None]
+                if pending:
+                    stack.extend(pending)
+                else:
+                    count[x] = 1 if x == sid else sum(count[index[p.id]] for p in preds[x]
+                                                      if count[index[p.id]] != -1)
+                    stack.pop()
+        return count
+
+    def _get_spt(self, u):
+        '''Get the shortest-path DAG from vertex u, computing it on demand.'''
+        sid = self.index[u.id]
+        if sid not in self.spt:
+            self.dijkstra(u)
+        return self.spt[sid]
+
+    def path_count(self, u, v):
+        '''Get the number of shortest paths from vertex u to vertex v.'''
+        return self._get_spt(u)[2][self.index[v.id]]
+
+    def iter_paths(self, u, v):
+        '''
+        Generate the shortest paths from vertex u to vertex v one at a time, each as a list of vertices.
+
+        The DAG is walked backwards from v, so only the paths that are asked for are built.
+        '''
+        _, preds, count = self._get_spt(u)
+        index = self.index
+        if count[index[v.id]] == 0:
+            return
+        chain = [v]  # v back to the current vertex
+        stack = [iter(preds[index[v.id]])]
+        while stack:
+            if chain[-1] is u:
+                yield chain[::-1]
+                chain.pop()
+                stack.pop()
+                continue
+            p = next(stack[-1], None)
+            if p is None:  # all the predecessors are done
+                chain.pop()
+                stack.pop()
+            else:
+                chain.append(p)
+                stack.append(iter(preds[index[p.id]]))
+
+    def get_pathstr(self, u, v, limit=None, reverse=False):
+        '''
+        Get the shortest paths from vertex u to vertex v as a string.
+
+        Parameters:
+            - limit: the maximum number of paths to list, default is None (all of them).
+            - reverse: whether to write each path backwards, from v to u, default is False. On an
+              undirected graph these are the shortest paths from v to u, found with the tree of u.
+        '''
         paths_str = []
-        for path in paths:
-            path_str = ' -> '.join(str(vertex) for vertex in path)
+        for path in self.iter_paths(u, v):
+            if limit is not None and len(paths_str) == limit:
+                paths_str.append('... {} shortest paths in total'.format(self.path_count(u, v)))
+                break
+            path_str = ' -> '.join(str(vertex) for vertex in (path[::-1] if reverse else path))
             paths_str.append(path_str)
+        if not paths_str:
+            return 'No path from {} to {} exists.'.format(*((v.id, u.id) if reverse else (u.id, v.id)))
 
         return '\n'.join(paths_str)
     
@@ -214,59 +854,33 @@ class Graph:
     def mst_kruskal(self):
         '''
         Krukal's algorithm for finding the minimum spanning tree of a graph.
+
+        It runs on the arrays of the CSR form of the graph, sorting the edges with NumPy if it is
+        installed and in pure Python otherwise, see CSRGraph.mst_kruskal.
         
         Returns:
-            - mst: the minimum spanning tree of the graph.
+            - mst: the minimum spanning tree of the graph, as (u, v, weight) edges.
         '''
-        # initialize the minimum spanning tree
-        mst = []
-        # initialize the disjoint-set data structure
-        for v in self.v:
-            self._makeset(v)
-        # sort the edges of the graph by weight
-        edges = self.get_edges()
-        edges.sort(key=lambda x: x[2])
-        for u, v, w in edges:
-            # if the two vertices are in different sets
-            if self._findset(u) != self._findset(v):
-                # add the edge to the minimum spanning tree
-                mst.append((u, v, w))
-                # union the two sets
-                self._unionset(u, v)
-        return mst
+        return [(self.v[u], self.v[v], w) for u, v, w in self.to_csr().mst_kruskal()]
 
-    def _makeset(self, x):
-        '''Make a set containing x.'''
-        x.pi = x
-        x.rank = 0
-
-    def _unionset(self, x, y):
-        '''Union the sets that contain x and y.'''
-        self._linkset(self._findset(x), self._findset(y))
+    def mst_boruvka(self):
+        '''
+        Boruvka's algorithm for finding the minimum spanning tree of a graph.
 
-    def _linkset(self, x, y):
-        '''Link the set that contains x to the set that contains y.'''
-        if x.rank > y.rank:
-            y.pi = x
-        else:
-            x.pi = y
-            if x.rank == y.rank:
-                y.rank += 1
+        It runs on the arrays of the CSR form of the graph, see CSRGraph.mst_boruvka.
 
-    def _findset(self, x):
-        '''Find the set that contains x.'''
-        # if x is not the root
-        if x != x.pi:
-            # set the parent of x to the root of the set that contains x
-            x.pi = self._findset(x.pi)
-        return x.pi
+        Returns:
+            - mst: the minimum spanning tree of the graph, as (u, v, weight) edges.
+        '''
+        return [(self.v[u], self.v[v], w) for u, v, w in self.to_csr().mst_boruvka()]
 
-    def mst_prim(self, r):
+    def mst_prim(self, r, arity=4):
         '''
         Prim's algorithm for finding the minimum spanning tree of a graph.
         
         Parameters:
             - r: the root of the minimum spanning tree.
+            - arity: the number of children of each node of the priority queue, default is 4.
         
         Returns:
             - mst: the minimum spanning tree of the graph.
@@ -276,22 +890,19 @@ class Graph:
             u.set_distance(float('inf'))
             u.set_predecessor(None)
         r.set_distance(0)
-        pq = []
-        in_pq = set()  # a set of vertices in the priority queue
+        index = self.index
+        pq = DaryHeap(len(self.v), arity)  # keyed by vertex index
+        pq.push(index[r.id], 0)
         for v in self.v:
-            heapq.heappush(pq, (v.d, v))
-            in_pq.add(v.id)
+            if v is not r:
+                pq.push(index[v.id], v.d)
         while pq:
-            _, u = heapq.heappop(pq)
-            if u.id in in_pq:
-                in_pq.remove(u.id)
-            else:
-                continue
+            u = self.v[pq.pop()[0]]
             for v in u.ad:
-                if v.id in in_pq and u.ad[v] < v.d:
+                if index[v.id] in pq and u.ad[v] < v.d:
                     v.set_distance(u.ad[v])
                     v.set_predecessor(u)
-                    heapq.heappush(pq, (v.d, v))
+                    pq.decrease_key(index[v.id], v.d)
         # construct the minimum spanning tree
         mst = []
         for u in self.v:
@@ -314,27 +925,27 @@ class Graph:
     
     def maxpathcount(self):
         '''Show the max count of the shortest path between any two vertices'''
-        self.dijkstra_allpairs()
         max_paths = 0
-        n = len(self.v)
-        for i in range(n):
-            for j in range(n):
-                tmp = len(self.allpaths[i][j])
-                if tmp > max_paths:
-                    max_paths = tmp
+        for s in self.v:  # one source at a time, reusing the trees already computed
+            tmp = max(self._get_spt(s)[2])
+            if tmp > max_paths:
+                max_paths = tmp
         return max_paths
 
-    def bus_route(self, r):
-        '''Find the bus route from the root r.'''
-        self.dijkstra_allpairs()
-        sid = alp[r.id]
+    def bus_route(self, r, stops=None):
+        '''
+        Find the bus route from the root r: the union of one shortest path from r to every stop.
+
+        Parameters:
+            - stops: the vertices the route must reach, default is None (every vertex).
+        '''
         # store the bus route edges, avoiding duplicates
         edges = set()
         # total length of the bus route
         total = 0
-        for paths in self.allpaths[sid]:
-            if paths:
-                path = paths[0]
+        for x in self.v if stops is None else stops:
+            path = next(self.iter_paths(r, x), None)  # the first shortest path only
+            if path:
                 if len(path) == 1:
                     continue
                 for i in range(len(path) - 1):
@@ -345,12 +956,119 @@ class Graph:
                         total += u.ad[v]
         return f'{total:.2f}', edges
 
+    def steiner_tree(self, terminals, arity=4):
+        '''
+        Mehlhorn's 2-approximation of the shortest network connecting all the terminals.
+
+        A single Dijkstra from all the terminals at once splits the vertices into Voronoi regions,
+        one per nearest terminal. Each edge between two regions gives a path between their
+        terminals, and the minimum spanning tree of the shortest such paths is expanded back
+        into edges. Its own minimum spanning tree, with the leaves that are not terminals pruned
+        away, is the result, at most twice as long as the optimal Steiner tree.
+
+        Parameters:
+            - terminals: the vertices to connect, e.g., the stops of a bus line.
+            - arity: the number of children of each node of the priority queue, default is 4.
+
+        Returns:
+            - (total length as a string, set of (u, v) edges with u.id < v.id), as bus_route.
+        '''
+        index, V = self.index, self.v
+        n = len(V)
+        dist = [float('inf')] * n
+        near = [-1] * n  # the nearest terminal of each vertex
+        pred = [-1] * n  # the previous vertex on the way from it
+        pq = DaryHeap(n, arity)
+        for t in terminals:
+            i = index[t.id]
+            dist[i], near[i] = 0, i
+            if i not in pq:
+                pq.push(i, 0)
+        while pq:
+            i, d = pq.pop()
+            for v, w in V[i].ad.items():
+                j = index[v.id]
+                if d + w < dist[j]:
+                    dist[j], near[j], pred[j] = d + w, near[i], i
+                    pq.push_or_decrease(j, d + w)
+        # the shortest path between each pair of neighbouring regions, by its bridging edge
+        bridges = {}
+        for u in V:
+            i = index[u.id]
+            for v, w in u.ad.items():
+                j = index[v.id]
+                if near[i] != -1 and near[j] != -1 and near[i] < near[j]:
+                    length = dist[i] + w + dist[j]
+                    if length < bridges.get((near[i], near[j]), (float('inf'),))[0]:
+                        bridges[(near[i], near[j])] = (length, i, j, w)
+        edges = {}  # the expanded network, (i, j) with i < j to weight
+        for a, b in self._spanning_forest((length, a, b) for (a, b), (length, _, _, _) in bridges.items()):
+            _, i, j, w = bridges[(a, b)]
+            edges[(min(i, j), max(i, j))] = w
+            for k in (i, j):
+                while pred[k] != -1:
+                    p = pred[k]
+                    edges[(min(p, k), max(p, k))] = V[p].ad[V[k]]
+                    k = p
+        tree = self._spanning_forest((w, i, j) for (i, j), w in edges.items())
+        # prune the leaves that are not terminals, until there are none
+        degree = {}
+        adjacent = {}
+        for i, j in tree:
+            for a, b in ((i, j), (j, i)):
+                degree[a] = degree.get(a, 0) + 1
+                adjacent.setdefault(a, []).append(b)
+        keep = {index[t.id] for t in terminals}
+        leaves = [i for i, k in degree.items() if k == 1 and i not in keep]
+        removed = set()
+        while leaves:
+            i = leaves.pop()
+            removed.add(i)
+            for j in adjacent[i]:
+                if j not in removed:
+                    degree[j] -= 1
+                    if degree[j] == 1 and j not in keep:
+                        leaves.append(j)
+        result = set()
+        total = 0
+        for i, j in tree:
+            if i not in removed and j not in removed:
+                u, v = V[i], V[j]
+                result.add((u, v) if u.id < v.id else (v, u))
+                total += edges[(i, j)]
+        return f'{total:.2f}', result
+
+    def _spanning_forest(self, edges):
+        '''Kruskal's algorithm on (weight, a, b) edges of any hashable a and b, returning the (a, b) pairs kept.'''
+        parent = {}
+        forest = []
+        for _, a, b in sorted(edges):
+            ra, rb = a, b
+            while parent.get(ra, ra) != ra:  # path halving
+                parent[ra] = parent.get(parent[ra], parent[ra])
+                ra = parent[ra]
+            while parent.get(rb, rb) != rb:
+                parent[rb] = parent.get(parent[rb], parent[rb])
+                rb = parent[rb]
+            if ra != rb:
+                parent[ra] = rb
+                forest.append((a, b))
+        return forest
+
     '''
     Initialize the graph.
     '''
     
-    def init_adjlist(self, filename):
-        '''Parsing the data and building the adjacency list'''
+    def init_adjlist(self, filename, directed=False):
+        '''
+        Parsing the data and building the adjacency list.
+
+        Of parallel edges, i.e. lines with the same two ends (and the same direction if directed),
+        only the lightest is kept, as load_csr and CSRGraph do.
+
+        Parameters:
+            - directed: whether each line is a one-way edge, default is False.
+        '''
         with open (filename, 'r', encoding = "utf-8") as f:
             data = f.read()
         graphtmp = {}
@@ -363,12 +1081,42 @@ class Graph:
                 graphtmp[from_id] = Vertex(from_id)
             if to_id not in graphtmp:
                 graphtmp[to_id] = Vertex(to_id)
-            graphtmp[from_id].add_neighbour(graphtmp[to_id], weight)  # add the edge
-            graphtmp[to_id].add_neighbour(graphtmp[from_id], weight)
+            u, v = graphtmp[from_id], graphtmp[to_id]
+            weight = min(weight, u.ad.get(v, weight))  # a parallel edge keeps the lightest weight
+            u.add_neighbour(v, weight)  # add the edge
+            if not directed:
+                v.add_neighbour(u, weight)
         self.v = sorted(graphtmp.values(), key=lambda x: x.id)  # sort the vertices by id(A-Z)
-        self.allpaths = [[[] for _ in range(len(self.v))] for _ in range(len(self.v))]
-        for i in range(len(self.v)):
-            self.allpaths[i][i].append([self.v[i]])
+        self.index = VertexRegistry(u.id for u in self.v)
+        self.directed = directed
+        self.changed()
+
+    def init_binary(self, filename):
+        '''
+        Build the adjacency list from a binary graph file (see graphfile), nothing being parsed.
+
+        Vertex i of the file becomes self.v[i], and the coordinates are set if the file has any.
+        Only the parsing is saved: a Vertex and a dictionary entry are still made for every vertex
+        and edge, O(n + m) time. Code that can work on a CSRGraph should use GraphFile(filename).csr()
+        instead, which maps the file without copying it.
+        '''
+        from graphfile import GraphFile
+        graphfile = GraphFile(filename)
+        self.v = [Vertex(name) for name in graphfile.csr().names]
+        offsets, targets, weights = graphfile.offsets.tolist(), graphfile.targets.tolist(), graphfile.weights.tolist()
+        for i, u in enumerate(self.v):
+            for j in range(offsets[i], offsets[i + 1]):
+                u.ad[self.v[targets[j]]] = weights[j]
+        self.index = VertexRegistry(u.id for u in self.v)
+        self.directed = graphfile.directed
+        self.changed()
+        if graphfile.coords is not None:
+            self.set_coords(graphfile.coords_dict())
+
+    def save_binary(self, filename):
+        '''Write the graph and its coordinates, if any, to a binary graph file (see graphfile).'''
+        from graphfile import save_graph
+        save_graph(filename, self.to_csr(), self.directed, self.coords or None)
 
 
 
@@ -0,0 +1,46 @@
+import math
+import random
+import time
+from mainpj2 import Graph, Vertex
+
+
+def grid_graph(side):
+    '''A side x side grid road network, each road up to 30% longer than the straight line.'''
+    rng = random.Random(0)  # the same grid every time, without reseeding the caller's random
+    coords = {}
+    vertices = []
+    for r in range(side):
+        for c in range(side):
+            name = f'{r}_{c}'
+            coords[name] = (c + rng.uniform(-0.3, 0.3), r + rng.uniform(-0.3, 0.3))
+            vertices.append(Vertex(name))
+    for r in range(side):
+        for c in range(side):
+            u = vertices[r * side + c]
+            for v in ([vertices[r * side + c + 1]] if c + 1 < side else []) + \
+                     ([vertices[(r + 1) * side + c]] if r + 1 < side else []):
+                w = round(math.dist(coords[u.id], coords[v.id]) * rng.uniform(1, 1.3), 3)
+                u.add_neighbour(v, w)
+                v.add_neighbour(u, w)
+    graph = Graph(vertices)
+    graph.set_coords(coords)
+    return graph
+
+
+if __name__ == "__main__":
+    for side in [30, 100, 200]:
+        graph = grid_graph(side)
+        random.seed(1)
+        queries = [tuple(random.sample(graph.v, 2)) for _ in range(20)]
+        print(f'n = {len(graph.v)}, {len(queries)} random queries')
+        for name, search in [('dijkstra', lambda s, t: graph.dijkstra(s)),
+                             ('bidijkstra', graph.bidijkstra),
+                             ('astar', graph.astar)]:
+            settled = 0
+            start = time.perf_counter()
+            for s, t in queries:
+                search(s, t)
+                settled += graph.settled
+            elapsed = time.perf_counter() - start
+            print(f'  {name:10s} {settled / len(queries):9.1f} settled, {elapsed / len(queries) * 1000:8.3f} ms/query')
+            graph.spt = {}  # keep the stored DAGs of dijkstra from piling up
@@ -0,0 +1,47 @@
+class VertexRegistry:
+    '''
+    A two-way map between vertex names (any strings) and dense integer indices 0..n-1.
+
+    Indices are handed out in the order the names are added, so the registry of a graph
+    whose vertices are sorted by name numbers them in that order (A-Z -> 0-25 for edge.txt).
+    '''
+    def __init__(self, names=()):
+        '''
+        Initialize the registry.
+
+        Parameters:
+            - names: the names to register first, default is empty.
+        '''
+        self.names = []  # index -> name
+        self.ids = {}  # name -> index
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        '''Register name if it is new, and return its index.'''
+        i = self.ids.get(name)
+        if i is None:
+            i = len(self.names)
+            self.ids[name] = i
+            self.names.append(name)
+        return i
+
+    def get(self, name, default=None):
+        '''Return the index of name, or default if it is not registered.'''
+        return self.ids.get(name, default)
+
+    def name(self, i):
+        '''Return the name of index i.'''
+        return self.names[i]
+
+    def __getitem__(self, name):
+        return self.ids[name]
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
@@ -0,0 +1,151 @@
+import heapq
+import math
+
+
+class SpatialIndex:
+    '''
+    A k-d tree of segments, for finding what lies nearest to a point on the map.
+
+    Each node holds a range of the items, in tree order, and the bounding box of all of them;
+    a node is split at the median of the item centres along the longer side of its box, down to
+    leaf_size items. A vertex is stored as a segment of length zero, so the same tree answers
+    nearest-vertex and nearest-edge queries. The boxes bound the distance to everything below a
+    node, so a query only opens the few nodes near the point, O(log n) of them for evenly spread
+    items.
+    '''
+    def __init__(self, items, leaf_size=8):
+        '''
+        Build the index.
+
+        Parameters:
+            - items: list of (key, (x1, y1), (x2, y2)) segments, e.g., ('A', (55, 164), (55, 164)).
+            - leaf_size: the most items in a leaf, default is 8.
+        '''
+        self.items = list(items)
+        self.leaf_size = leaf_size
+        # the nodes: item range [lo, hi), children (-1 for a leaf) and bounding box
+        self.lo, self.hi, self.left, self.right, self.box = [], [], [], [], []
+        if self.items:
+            self._build()
+
+    @classmethod
+    def of_vertices(cls, coords, leaf_size=8):
+        '''Build the index of the points of a dictionary from vertex id to (x, y), such as Graph.coords.'''
+        return cls([(u, p, p) for u, p in coords.items()], leaf_size)
+
+    @classmethod
+    def of_edges(cls, graph, leaf_size=8):
+        '''Build the index of the edges of a Graph whose ends have coordinates, keyed by (u.id, v.id), u.id < v.id.'''
+        coords = graph.coords
+        items = []
+        for u in graph.v:
+            for v in u.ad:
+                if (graph.directed or u.id < v.id) and u.id in coords and v.id in coords:
+                    items.append(((u.id, v.id), coords[u.id], coords[v.id]))
+        return cls(items, leaf_size)
+
+    def __len__(self):
+        return len(self.items)
+
+    def _build(self):
+        '''Split the items into nodes, top down.'''
+        items = self.items
+        stack = [(0, len(items), self._new_node(0, len(items)))]
+        while stack:
+            lo, hi, node = stack.pop()
+            if hi - lo <= self.leaf_size:
+                continue
+            x1, y1, x2, y2 = self.box[node]
+            axis = 0 if x2 - x1 >= y2 - y1 else 1
+            items[lo:hi] = sorted(items[lo:hi], key=lambda item: item[1][axis] + item[2][axis])
+            mid = (lo + hi) // 2
+            self.left[node] = self._new_node(lo, mid)
+            self.right[node] = self._new_node(mid, hi)
+            stack.append((lo, mid, self.left[node]))
+            stack.append((mid, hi, self.right[node]))
+
+    def _new_node(self, lo, hi):
+        '''Add a leaf for the items lo..hi-1, and return its number.'''
+        xs = [p[0] for _, a, b in self.items[lo:hi] for p in (a, b)]
+        ys = [p[1] for _, a, b in self.items[lo:hi] for p in (a, b)]
+        self.lo.append(lo)
+        self.hi.append(hi)
+        self.left.append(-1)
+        self.right.append(-1)
+        self.box.append((min(xs), min(ys), max(xs), max(ys)))
+        return len(self.lo) - 1
+
+    @staticmethod
+    def _box_distance(box, x, y):
+        '''The distance from (x, y) to the nearest point of box, 0 inside it.'''
+        x1, y1, x2, y2 = box
+        return math.hypot(max(x1 - x, 0, x - x2), max(y1 - y, 0, y - y2))
+
+    @staticmethod
+    def closest_point(a, b, x, y):
+        '''
+        Find the point of the segment from a to b nearest to (x, y).
+
+        Returns:
+            - (the distance, (px, py) the nearest point).
+        '''
+        (ax, ay), (bx, by) = a, b
+        dx, dy = bx - ax, by - ay
+        length = dx * dx + dy * dy
+        t = 0 if length == 0 else min(1, max(0, ((x - ax) * dx + (y - ay) * dy) / length))
+        px, py = ax + t * dx, ay + t * dy
+        return math.hypot(x - px, y - py), (px, py)
+
+    def nearest(self, x, y, k=1):
+        '''
+        Find the k items nearest to (x, y), by best-first search of the nodes.
+
+        Returns:
+            - list of at most k (key, distance, (px, py) the nearest point of the item), nearest first.
+        '''
+        if not self.items:
+            return []
+        found = []  # max-heap of the k best so far, as (-distance, i, key, point)
+        pq = [(self._box_distance(self.box[0], x, y), 0)]
+        while pq:
+            d, node = heapq.heappop(pq)
+            if len(found) == k and d >= -found[0][0]:  # nothing left can be nearer
+                break
+            if self.left[node] == -1:
+                for i in range(self.lo[node], self.hi[node]):
+                    key, a, b = self.items[i]
+                    dist, point = self.closest_point(a, b, x, y)
+                    if len(found) < k:
+                        heapq.heappush(found, (-dist, i, key, point))
+                    elif dist < -found[0][0]:
+                        heapq.heapreplace(found, (-dist, i, key, point))
+            else:
+                for child in (self.left[node], self.right[node]):
+                    heapq.heappush(pq, (self._box_distance(self.box[child], x, y), child))
+        return [(key, -d, point) for d, _, key, point in sorted(found, reverse=True)]
+
+    def within(self, x, y, radius):
+        '''
+        Find the items within radius of (x, y).
+
+        Returns:
+            - list of (key, distance, (px, py) the nearest point of the item), nearest first.
+        '''
+        if not self.items:
+            return []
+        result = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if self._box_distance(self.box[node], x, y) > radius:
+                continue
+            if self.left[node] == -1:
+                for i in range(self.lo[node], self.hi[node]):
+                    key, a, b = self.items[i]
+                    dist, point = self.closest_point(a, b, x, y)
+                    if dist <= radius:
+                        result.append((dist, i, key, point))
+            else:
+                stack.append(self.left[node])
+                stack.append(self.right[node])
+        return [(key, dist, point) for dist, _, key, point in sorted(result)]
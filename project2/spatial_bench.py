@@ -0,0 +1,26 @@
+import math
+import random
+import time
+from p2p_bench import grid_graph
+from spatial import SpatialIndex
+
+
+if __name__ == "__main__":
+    for side in [30, 100, 300]:
+        graph = grid_graph(side)
+        start = time.perf_counter()
+        vertices = SpatialIndex.of_vertices(graph.coords)
+        edges = SpatialIndex.of_edges(graph)
+        build = time.perf_counter() - start
+        random.seed(1)
+        clicks = [(random.uniform(0, side), random.uniform(0, side)) for _ in range(200)]
+        print(f'n = {len(vertices)}, {len(edges)} edges, both indexes built in {build:.3f}s')
+        for name, query in [('nearest vertex', lambda x, y: vertices.nearest(x, y)),
+                            ('nearest edge', lambda x, y: edges.nearest(x, y)),
+                            ('vertices within 2', lambda x, y: vertices.within(x, y, 2)),
+                            ('linear scan', lambda x, y: min(graph.coords.items(),
+                                                             key=lambda item: math.dist(item[1], (x, y))))]:
+            start = time.perf_counter()
+            for x, y in clicks:
+                query(x, y)
+            print(f'  {name:18s} {(time.perf_counter() - start) / len(clicks) * 1e6:9.1f} us/query')
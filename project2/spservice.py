@@ -0,0 +1,203 @@
+from collections import OrderedDict
+import heapq
+
+
+class LRUCache(OrderedDict):
+    '''
+    A dictionary holding at most capacity entries, dropping the least recently used one when full.
+
+    Lookups through [] and in are counted as hits or misses.
+    '''
+    def __init__(self, capacity):
+        super().__init__()
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key):
+        found = super().__contains__(key)
+        if found:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return found
+
+    def __getitem__(self, key):
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.capacity:
+            self.popitem(last=False)
+
+
+class ShortestPathService:
+    '''
+    Shortest-path queries on a Graph, computing single-source trees only when first needed.
+
+    The trees are memoized in a bounded LRU cache keyed by the index of the source vertex. The
+    cache replaces graph.spt, so every Graph method that needs a tree goes through it. When vertices
+    are added or edges are added, removed or reweighted the cached trees are repaired in place (see
+    repair) rather than recomputed; any other change to the graph empties the cache.
+    '''
+    def __init__(self, graph, capacity=64):
+        '''
+        Initialize the service.
+
+        Parameters:
+            - graph: the Graph to answer queries on.
+            - capacity: the most single-source trees kept at once, default is 64.
+        '''
+        self.graph = graph
+        self.cache = LRUCache(capacity)
+        graph.spt = self.cache
+        graph.spt_repair = self.repair
+
+    def distance(self, u, v):
+        '''Get the length of the shortest path from vertex u to vertex v, infinity if there is none.'''
+        return self.graph._get_spt(u)[0][self.graph.index[v.id]]
+
+    def shortest_path(self, u, v):
+        '''Get one shortest path from vertex u to vertex v as a list of vertices, None if there is none.'''
+        return next(self.graph.iter_paths(u, v), None)
+
+    def iter_paths(self, u, v):
+        '''Generate all the shortest paths from vertex u to vertex v.'''
+        return self.graph.iter_paths(u, v)
+
+    def path_count(self, u, v):
+        '''Get the number of shortest paths from vertex u to vertex v.'''
+        return self.graph.path_count(u, v)
+
+    def get_pathstr(self, u, v, limit=None, reverse=False):
+        '''Get the shortest paths from vertex u to vertex v as a string, see Graph.get_pathstr.'''
+        return self.graph.get_pathstr(u, v, limit, reverse)
+
+    def bus_route(self, r):
+        '''Find the bus route from the root r.'''
+        return self.graph.bus_route(r)
+
+    def maxpathcount(self):
+        '''Show the max count of the shortest path between any two vertices.'''
+        return self.graph.maxpathcount()
+
+    def repair(self, arcs):
+        '''
+        Update every cached tree after some edges changed, in the manner of Ramalingam and Reps.
+
+        Only the vertices whose distance changes are searched again: first those that lost every
+        shortest path through a longer or removed edge, by a Dijkstra seeded from their unaffected
+        in-neighbours, then those reached more cheaply through a shorter or new edge, by a Dijkstra
+        from its head. The predecessors of these vertices and their out-neighbours are then rebuilt,
+        and the path counts of everything below them in the DAG are summed again in distance order.
+
+        Vertices added to the graph are appended to every tree as unreachable.
+
+        Parameters:
+            - arcs: the changed edges as (u, v, old weight, new weight), as given by Graph.changed.
+        '''
+        in_edges = self.graph.in_edges()
+        n = len(self.graph.v)
+        for sid in list(self.cache.keys()):
+            tree = OrderedDict.__getitem__(self.cache, sid)
+            d, preds, count = tree
+            for _ in range(n - len(d)):
+                d.append(float('inf'))
+                preds.append([])
+                count.append(0)
+            self._repair_tree(tree, sid, arcs, in_edges)
+
+    def _repair_tree(self, tree, sid, arcs, in_edges):
+        '''Repair the tree (d, preds, count) from source index sid, see repair.'''
+        d, preds, count = tree
+        V, index = self.graph.v, self.graph.index
+        inf = float('inf')
+        touched = set()  # the vertices whose predecessors may have changed
+        # 1. longer or removed edges: find the vertices left without any shortest path
+        lost = []
+        for u, v, old, new in arcs:
+            if old is not None and (new is None or new > old) and V[u] in preds[v]:
+                preds[v] = [p for p in preds[v] if p is not V[u]]
+                touched.add(v)
+                if not preds[v] and v != sid:
+                    lost.append(v)
+        affected = set()
+        while lost:
+            x = lost.pop()
+            if x in affected:
+                continue
+            affected.add(x)
+            for y, w in V[x].ad.items():
+                iy = index[y.id]
+                if V[x] in preds[iy]:
+                    preds[iy] = [p for p in preds[iy] if p is not V[x]]
+                    touched.add(iy)
+                    if not preds[iy] and iy != sid:
+                        lost.append(iy)
+        old_d = {x: d[x] for x in affected}
+        pq = []
+        for x in affected:
+            d[x] = inf
+        for x in affected:
+            for p, w in in_edges(V[x]):
+                ip = index[p.id]
+                if ip not in affected and d[ip] + w < d[x]:
+                    d[x] = d[ip] + w
+            if d[x] < inf:
+                pq.append((d[x], x))
+        heapq.heapify(pq)
+        while pq:
+            dx, x = heapq.heappop(pq)
+            if dx > d[x]:
+                continue
+            for y, w in V[x].ad.items():
+                iy = index[y.id]
+                if iy in affected and dx + w < d[iy]:
+                    d[iy] = dx + w
+                    heapq.heappush(pq, (dx + w, iy))
+        # 2. shorter or new edges: spread the improvement from their heads
+        for u, v, old, new in arcs:
+            if new is not None and (old is None or new < old):
+                touched.add(v)
+                if d[u] + new < d[v]:
+                    old_d.setdefault(v, d[v])
+                    d[v] = d[u] + new
+                    heapq.heappush(pq, (d[v], v))
+        while pq:
+            dx, x = heapq.heappop(pq)
+            if dx > d[x]:
+                continue
+            for y, w in V[x].ad.items():
+                iy = index[y.id]
+                if dx + w < d[iy]:
+                    old_d.setdefault(iy, d[iy])
+                    d[iy] = dx + w
+                    heapq.heappush(pq, (dx + w, iy))
+        # 3. rebuild the predecessors around every vertex whose distance changed
+        for x, dx in old_d.items():
+            if d[x] != dx or x in affected:
+                touched.add(x)
+                touched.update(index[y.id] for y in V[x].ad)
+        for x in touched:
+            if x != sid:
+                preds[x] = [p for p, w in in_edges(V[x]) if d[x] < inf and d[index[p.id]] + w == d[x]]
+        # 4. count the paths again below the touched vertices, in distance order
+        below = set(touched)
+        stack = list(touched)
+        while stack:
+            x = stack.pop()
+            for y, w in V[x].ad.items():
+                iy = index[y.id]
+                if iy not in below and d[x] < inf and d[x] + w == d[iy]:
+                    below.add(iy)
+                    stack.append(iy)
+        for x in sorted(below, key=d.__getitem__):
+            if x != sid:
+                count[x] = sum(count[index[p.id]] for p in preds[x])
+
+    def stats(self):
+        '''Get the cache statistics as a string.'''
+        return f'{len(self.cache)}/{self.cache.capacity} trees cached, {self.cache.hits} hits, {self.cache.misses} misses'
@@ -0,0 +1,19 @@
+import random
+from p2p_bench import grid_graph
+from benchutil import timed
+
+
+if __name__ == "__main__":
+    graph = grid_graph(100)
+    random.seed(3)
+    r = graph.v[0]
+    (total, edges), elapsed = timed(graph.bus_route, r)
+    print(f'n = {len(graph.v)}, bus_route to every vertex: {total} long, {len(edges)} edges, {elapsed:.3f}s')
+    for k in [5, 20, 100, 500]:
+        stops = random.sample(graph.v, k)
+        graph.changed()  # time bus_route with its Dijkstra
+        (route_total, route_edges), route_time = timed(graph.bus_route, r, stops)
+        (tree_total, tree_edges), tree_time = timed(graph.steiner_tree, [r] + stops)
+        print(f'  {k:3d} stops: bus_route {route_total:>8s} ({len(route_edges):4d} edges, {route_time:.3f}s), '
+              f'steiner_tree {tree_total:>8s} ({len(tree_edges):4d} edges, {tree_time:.3f}s), '
+              f'{float(tree_total) / float(route_total):.0%} of the length')
@@ -0,0 +1,255 @@
+from bisect import bisect_right
+from dheap import DaryHeap
+
+
+class SpeedProfile:
+    '''
+    A daily traffic pattern: the factor by which an edge is slower than its free-flow weight,
+    piecewise linear in the time of departure and repeating every period.
+    '''
+    __slots__ = ('name', 'times', 'factors', 'period')
+
+    def __init__(self, name, times, factors, period=1440):
+        '''
+        Initialize a profile.
+
+        Parameters:
+            - name: the name of the profile, e.g., rush.
+            - times: the increasing breakpoints, in [0, period).
+            - factors: the factor at each breakpoint, e.g., 1.8 at 8 o'clock.
+            - period: the length of a day, default is 1440 (minutes).
+        '''
+        if not times or len(times) != len(factors):
+            raise ValueError('A profile needs as many factors as breakpoints.')
+        if any(a >= b for a, b in zip(times, times[1:])) or times[0] < 0 or times[-1] >= period:
+            raise ValueError('The breakpoints of profile {} must increase within the period.'.format(name))
+        if min(factors) <= 0:
+            raise ValueError('The factors of profile {} must be positive.'.format(name))
+        self.name = name
+        self.times = list(times)
+        self.factors = list(factors)
+        self.period = period
+
+    def __call__(self, t):
+        '''Get the factor for leaving at time t.'''
+        times, factors, period = self.times, self.factors, self.period
+        t %= period
+        i = bisect_right(times, t)
+        # the pieces wrap around the end of the day
+        t0, f0 = (times[i - 1], factors[i - 1]) if i > 0 else (times[-1] - period, factors[-1])
+        t1, f1 = (times[i], factors[i]) if i < len(times) else (times[0] + period, factors[0])
+        if t1 == t0:
+            return f0
+        return f0 + (f1 - f0) * (t - t0) / (t1 - t0)
+
+    def min_slope(self):
+        '''Get the steepest decrease of the factor per unit of time, wrap-around piece included.'''
+        times = self.times + [self.times[0] + self.period]
+        factors = self.factors + [self.factors[0]]
+        return min(((f1 - f0) / (t1 - t0) for t0, t1, f0, f1 in zip(times, times[1:], factors, factors[1:])
+                    if t1 > t0), default=0)
+
+
+class TimeDependentGraph:
+    '''
+    A Graph whose edges take longer at some hours of the day.
+
+    The weights in u.ad are lengths, e.g. km in edge.txt, covered at a free-flow speed in length
+    per hour, so edge (u, v) takes weight * 60 / speed minutes when the road is clear. Leaving
+    at time t it takes that times the factor of its profile at t; edges without a profile always
+    take their free-flow time. Profiles are shared between edges, so a whole network needs only a
+    handful of them, and one graph serves every hour of the day.
+
+    All the travel-time functions must be FIFO: leaving later never means arriving earlier,
+    i.e. free-flow time * slope >= -1 on every piece. Then the earliest arrival at every vertex
+    can be found by Dijkstra's algorithm on arrival times. The profiles follow the changes made
+    to the graph: a change making an edge not FIFO is refused, and a removed edge loses its profile.
+    '''
+    def __init__(self, graph, profiles=None, period=1440, speed=60):
+        '''
+        Initialize a time-dependent graph with no profiles assigned, use load to read some.
+
+        Parameters:
+            - graph: the Graph of free-flow weights.
+            - profiles: a dictionary from name to SpeedProfile, default is None (no profiles).
+            - period: the length of a day, default is 1440 (minutes).
+            - speed: the free-flow speed in weight units per hour, default is 60, i.e. a weight
+              of 1 (km) takes a minute.
+        '''
+        if speed <= 0:
+            raise ValueError('The free-flow speed must be positive.')
+        self.graph = graph
+        self.profiles = dict(profiles or {})
+        self.period = period
+        self.speed = speed
+        self.pace = 60 / speed  # minutes per unit of weight
+        self.edge_profile = [{} for _ in graph.v]  # the profile of each edge, by the index of its tail
+        self._index = graph.index  # the registry edge_profile is indexed by
+        graph.guards.append(self._check)
+        graph.watchers.append(self._changed)
+
+    def set_profile(self, u, v, name):
+        '''Give the edge (u, v), both ways unless the graph is directed, the profile called name.'''
+        profile = self.profiles[name]
+        for a, b in [(u, v)] if self.graph.directed else [(u, v), (v, u)]:
+            if b not in a.ad:
+                raise ValueError('No edge from {} to {} exists.'.format(a.id, b.id))
+            self._check_fifo(a, b, a.ad[b], profile)
+            self.edge_profile[self.graph.index[a.id]][b] = profile
+
+    def _check_fifo(self, u, v, weight, profile):
+        '''Raise ValueError if the edge (u, v) of the given weight would not be FIFO with profile.'''
+        if weight * self.pace * profile.min_slope() < -1:
+            raise ValueError('Edge from {} to {} would not be FIFO with profile {}.'.format(u.id, v.id, profile.name))
+
+    def _check(self, arcs):
+        '''
+        Refuse a change leaving an edge with a profile not FIFO, as one of the guards of the graph
+        (see Graph.guards), raising ValueError before anything is changed.
+        '''
+        V = self.graph.v
+        for u, v, _, new in arcs:
+            profile = self.edge_profile[u].get(V[v]) if u < len(self.edge_profile) else None
+            if profile is not None and new is not None:
+                self._check_fifo(V[u], V[v], new, profile)
+
+    def _changed(self, arcs):
+        '''
+        Keep the profiles in step with the graph, as one of its watchers (see Graph.changed).
+
+        New vertices get an empty entry in edge_profile and removed edges lose their profile. When
+        the whole graph was reloaded (arcs is None) the profiles are moved to the new vertices by id,
+        keeping only those of edges still there and still FIFO.
+        '''
+        V = self.graph.v
+        if arcs is None:
+            old, index = self.edge_profile, self.graph.index
+            self.edge_profile = [{} for _ in V]
+            for i, edges in enumerate(old):
+                u = index.get(self._index.name(i))
+                for v, profile in edges.items():
+                    w = V[u].ad.get(V[index[v.id]]) if u is not None and v.id in index else None
+                    if w is not None and w * self.pace * profile.min_slope() >= -1:
+                        self.edge_profile[u][V[index[v.id]]] = profile
+            self._index = index
+            return
+        self.edge_profile.extend({} for _ in range(len(V) - len(self.edge_profile)))
+        for u, v, _, new in arcs:
+            if new is None:
+                self.edge_profile[u].pop(V[v], None)
+
+    def travel_time(self, u, v, t):
+        '''Get the time it takes to go along the edge (u, v) leaving at time t.'''
+        profile = self.edge_profile[self.graph.index[u.id]].get(v)
+        if profile is None:
+            return u.ad[v] * self.pace
+        return u.ad[v] * self.pace * profile(t)
+
+    def path_time(self, path, depart):
+        '''Get the time it takes to follow a path, e.g. [A,B,C,...], leaving at time depart.'''
+        t = depart
+        for i in range(len(path) - 1):
+            t += self.travel_time(path[i], path[i + 1], t)
+        return t - depart
+
+    def earliest_arrival(self, s, depart, arity=4):
+        '''
+        Time-dependent Dijkstra's algorithm from vertex s leaving at time depart.
+
+        Returns:
+            - arrival: list of the earliest arrival time at each vertex, infinity if unreachable.
+            - pi: list of the predecessor index of each vertex on its fastest path, -1 if none.
+        '''
+        V, index, pace = self.graph.v, self.graph.index, self.pace
+        n = len(V)
+        arrival = [float('inf')] * n
+        pi = [-1] * n
+        done = [False] * n
+        si = index[s.id]
+        arrival[si] = depart
+        pq = DaryHeap(n, arity)
+        pq.push(si, depart)
+        while pq:
+            i, t = pq.pop()
+            done[i] = True
+            u = V[i]
+            profiles = self.edge_profile[i]
+            for v, w in u.ad.items():
+                j = index[v.id]
+                if done[j]:
+                    continue
+                profile = profiles.get(v)
+                reach = t + (w * pace if profile is None else w * pace * profile(t))
+                if reach < arrival[j]:
+                    arrival[j] = reach
+                    pi[j] = i
+                    pq.push_or_decrease(j, reach)
+        return arrival, pi
+
+    def route(self, s, t, depart):
+        '''
+        Find the fastest path from vertex s to vertex t leaving at time depart.
+
+        Returns:
+            - (the travel time, the path as a list of vertices), or (infinity, []) if there is none.
+        '''
+        arrival, pi = self.earliest_arrival(s, depart)
+        i = self.graph.index[t.id]
+        if arrival[i] == float('inf'):
+            return float('inf'), []
+        path = []
+        while i != -1:
+            path.append(self.graph.v[i])
+            i = pi[i]
+        return arrival[self.graph.index[t.id]] - depart, path[::-1]
+
+    def save(self, filename):
+        '''
+        Write the profiles to a text file: "period p" and "speed s", then a "profile name time:factor ..."
+        line per profile, then a "u v name" line per edge that has one (once per road if undirected).
+        '''
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(f'period {self.period!r}\n')
+            f.write(f'speed {self.speed!r}\n')
+            for profile in self.profiles.values():
+                points = ' '.join(f'{t!r}:{x!r}' for t, x in zip(profile.times, profile.factors))
+                f.write(f'profile {profile.name} {points}\n')
+            directed = self.graph.directed
+            for u, edges in zip(self.graph.v, self.edge_profile):
+                for v, profile in edges.items():
+                    if directed or u.id < v.id:
+                        f.write(f'{u.id} {v.id} {profile.name}\n')
+
+    @classmethod
+    def load(cls, graph, filename):
+        '''Read the profiles of graph written by save; lines starting with # are skipped.'''
+        tdgraph = cls(graph)
+        with open(filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                fields = line.split()
+                if not fields or fields[0].startswith('#'):
+                    continue
+                if fields[0] == 'period':
+                    tdgraph.period = float(fields[1])
+                elif fields[0] == 'speed':
+                    tdgraph.speed = float(fields[1])
+                    tdgraph.pace = 60 / tdgraph.speed
+                elif fields[0] == 'profile':
+                    points = [p.split(':') for p in fields[2:]]
+                    tdgraph.profiles[fields[1]] = SpeedProfile(fields[1], [float(t) for t, _ in points],
+                                                               [float(x) for _, x in points], tdgraph.period)
+                else:
+                    u, v, name = fields
+                    tdgraph.set_profile(graph.vertex(u), graph.vertex(v), name)
+        return tdgraph
+
+
+if __name__ == "__main__":
+    from mainpj2 import Graph
+    map1 = Graph()
+    map1.init_adjlist('./project2/edge.txt')
+    traffic = TimeDependentGraph.load(map1, './project2/profile.txt')
+    s, t = map1.vertex('A'), map1.vertex('Z')
+    for hour in range(0, 24, 2):
+        time, path = traffic.route(s, t, hour * 60)
+        print(f'{hour:02d}:00  {time:6.2f}  {"->".join(u.id for u in path)}')
@@ -0,0 +1,32 @@
+import math
+import apsp
+from mainpj2 import Graph
+
+
+def load(tmp_path, text, directed=False):
+    '''A Graph read from the given edge list.'''
+    filename = tmp_path / 'edges.txt'
+    filename.write_text(text, encoding='utf-8')
+    graph = Graph()
+    graph.init_adjlist(str(filename), directed)
+    return graph
+
+
+def test_zero_weight_next_hops(tmp_path):
+    graph = load(tmp_path, 's b 1\nb a 0\n', directed=True)
+    D = graph.dijkstra_allpairs_parallel(workers=1)
+    s, a, b = (graph.index[name] for name in 'sab')
+    assert D[s, a] == 1
+    assert apsp.path(graph.next_hop, s, a) == [s, b, a]
+    assert [u.id for u in graph.get_fw_path(graph.vertex('s'), graph.vertex('a'))] == ['s', 'b', 'a']
+    assert apsp.path(graph.next_hop, a, s) == []
+
+
+def test_next_hops_match_distances(tmp_path):
+    graph = load(tmp_path, 'a b 0\nb c 0\nc d 2\na d 2\nd e 0\ne f 1.5\nb f 4\n')
+    D = graph.dijkstra_allpairs_parallel(workers=1)
+    for i in range(len(graph.v)):
+        for j in range(len(graph.v)):
+            path = apsp.path(graph.next_hop, i, j)
+            assert path[0] == i and path[-1] == j
+            assert math.isclose(sum(graph.v[x].ad[graph.v[y]] for x, y in zip(path, path[1:])), D[i, j])
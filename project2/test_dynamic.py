@@ -0,0 +1,115 @@
+import math
+import os
+import random
+from mainpj2 import Graph, Vertex
+from p2p_bench import grid_graph
+from spservice import ShortestPathService
+from tdroute import TimeDependentGraph
+
+
+def copy_graph(graph):
+    '''A fresh copy of graph, with nothing cached.'''
+    vertices = [Vertex(u.id) for u in graph.v]
+    copy = Graph(vertices)
+    for u, c in zip(graph.v, vertices):
+        for v, w in u.ad.items():
+            c.add_neighbour(copy.vertex(v.id), w)
+    copy.directed = graph.directed
+    return copy
+
+
+def fresh_tree(graph, s):
+    '''(distances, predecessor ids, path counts) from s, computed from scratch.'''
+    copy = copy_graph(graph)
+    copy.dijkstra(copy.vertex(s.id))
+    d, preds, count = copy.spt[copy.index[s.id]]
+    return d, [sorted(p.id for p in ps) for ps in preds], count
+
+
+def random_change(graph, new_ids):
+    '''Apply a random change: a road closed, opened, slowed down or sped up, or a vertex added.'''
+    r = random.random()
+    u = random.choice(graph.v)
+    if r < 0.05:
+        graph.add_vertex(next(new_ids))
+    elif r < 0.25 or not u.ad:
+        v = random.choice(graph.v)
+        if v is not u:
+            graph.add_edge(u, v, round(random.uniform(0.1, 3), 1))
+    elif r < 0.4:
+        graph.remove_edge(u, random.choice(list(u.ad)))
+    else:
+        v = random.choice(list(u.ad))
+        graph.update_weight(u, v, max(0.1, round(u.ad[v] * random.choice([0.05, 0.5, 2]), 1)))
+
+
+def test_astar_after_updates():
+    random.seed(1)
+    graph = grid_graph(12)
+    for _ in range(40):
+        u = random.choice(graph.v)
+        v = random.choice(list(u.ad))
+        graph.update_weight(u, v, round(u.ad[v] * random.choice([0.05, 0.2, 3]), 3))
+        for _ in range(5):
+            s, t = random.sample(graph.v, 2)
+            graph.dijkstra(s)
+            expected = graph.spt[graph.index[s.id]][0][graph.index[t.id]]
+            assert math.isclose(graph.astar(s, t)[0], expected)
+
+
+def test_repair_matches_recompute():
+    for directed in [False, True]:
+        random.seed(2)
+        graph = grid_graph(8)
+        graph.directed = directed
+        service = ShortestPathService(graph, capacity=8)
+        new_ids = (f'new{i}' for i in range(1000))
+        sources = random.sample(graph.v, 4)
+        for _ in range(150):
+            for s in sources:
+                service.path_count(s, s)
+            random_change(graph, new_ids)
+            for s in sources:
+                d, preds, count = graph._get_spt(s)
+                expected = fresh_tree(graph, s)
+                assert d == expected[0]
+                assert [sorted(p.id for p in ps) for ps in preds] == expected[1]
+                assert count == expected[2]
+
+
+def test_add_vertex_keeps_trees():
+    graph = grid_graph(5)
+    service = ShortestPathService(graph)
+    s, t = graph.v[0], graph.v[-1]
+    far = service.distance(s, t)
+    u = graph.add_vertex('new')
+    assert len(service.cache) == 1
+    assert service.distance(s, u) == float('inf')
+    assert service.shortest_path(s, u) is None
+    graph.add_edge(t, u, 1.0)
+    assert service.distance(s, u) == far + 1.0
+    assert service.distance(s, t) == far
+
+
+def test_profiles_refuse_and_reload(tmp_path):
+    here = os.path.dirname(__file__)
+    graph = Graph()
+    graph.init_adjlist(os.path.join(here, 'edge.txt'))
+    traffic = TimeDependentGraph.load(graph, os.path.join(here, 'profile.txt'))
+    a, f = graph.vertex('A'), graph.vertex('F')
+    try:
+        graph.update_weight(a, f, 200.0)  # too slow to stay FIFO through the end of the rush hour
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('a non-FIFO weight was accepted')
+    assert a.ad[f] == f.ad[a] == 5.43
+    lines = open(os.path.join(here, 'edge.txt'), encoding='utf-8').read().splitlines()
+    edges = tmp_path / 'edge.txt'
+    edges.write_text('\n'.join(['Zero A 1.0'] + [l for l in lines if l != 'A F 5.43']), encoding='utf-8')
+    graph.init_adjlist(str(edges))
+    names = {(u.id, v.id): p.name for u, ps in zip(graph.v, traffic.edge_profile) for v, p in ps.items()}
+    assert ('A', 'F') not in names and ('F', 'A') not in names
+    assert names[('F', 'G')] == names[('G', 'F')] == 'rush'
+    assert names[('K', 'O')] == 'centre'
+    assert all(v in u.ad for u, ps in zip(graph.v, traffic.edge_profile) for v in ps)
@@ -0,0 +1,16 @@
+from loader import load_csr
+from mainpj2 import Graph
+
+
+def test_parallel_edges_keep_lightest(tmp_path):
+    filename = tmp_path / 'edges.txt'
+    filename.write_text('a b 5\nb c 1\nb a 2\na b 3\nc a 9\nc c 1\n', encoding='utf-8')
+    for directed in [False, True]:
+        graph = Graph()
+        graph.init_adjlist(str(filename), directed)
+        csr = load_csr(str(filename), directed, cache=False)
+        assert csr.m == sum(len(u.ad) for u in graph.v)
+        for u in graph.v:
+            i = csr.index[u.id]
+            assert {csr.names[j]: w for j, w in csr.neighbours(i)} == {v.id: w for v, w in u.ad.items()}
+        assert graph.vertex('a').ad[graph.vertex('b')] == (3 if directed else 2)
@@ -0,0 +1,48 @@
+import math
+import random
+import pytest
+from ch import ContractionHierarchy
+from mainpj2 import Graph
+from p2p_bench import grid_graph
+
+
+def load(tmp_path, text, directed=False):
+    '''A Graph read from the given edge list.'''
+    filename = tmp_path / 'edges.txt'
+    filename.write_text(text, encoding='utf-8')
+    graph = Graph()
+    graph.init_adjlist(str(filename), directed)
+    return graph
+
+
+def test_bidijkstra_directed(tmp_path):
+    graph = load(tmp_path, 'a b 1\nc b 1\nc a 3\nb d 2\nd c 1\n', directed=True)
+    for s in graph.v:
+        graph.dijkstra(s)
+        d = graph.spt[graph.index[s.id]][0]
+        for t in graph.v:
+            length, path = graph.bidijkstra(s, t)
+            assert length == d[graph.index[t.id]]
+            if path:
+                assert path[0] is s and path[-1] is t
+                assert sum(u.ad[v] for u, v in zip(path, path[1:])) == length
+    assert graph.bidijkstra(graph.vertex('a'), graph.vertex('c'))[0] == 4
+    assert graph.bidijkstra(graph.vertex('b'), graph.vertex('a'))[0] == 6
+
+
+def test_ch_rejects_directed(tmp_path):
+    graph = load(tmp_path, 'a b 1\nc b 1\n', directed=True)
+    with pytest.raises(ValueError):
+        ContractionHierarchy.build(graph)
+
+
+def test_ch_matches_dijkstra():
+    random.seed(4)
+    graph = grid_graph(15)
+    ch = ContractionHierarchy.build(graph)
+    for _ in range(100):
+        s, t = random.sample(graph.v, 2)
+        graph.dijkstra(s)
+        length, path = ch.query(s, t)
+        assert math.isclose(length, graph.spt[graph.index[s.id]][0][graph.index[t.id]])
+        assert math.isclose(sum(u.ad[v] for u, v in zip(path, path[1:])), length)